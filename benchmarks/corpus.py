@@ -0,0 +1,183 @@
+import random
+from collections import namedtuple
+
+LANGUAGES = ("python", "c", "java", "text")
+EXTENSIONS = {"python": ".py", "c": ".c", "java": ".java", "text": ".txt"}
+TRANSFORMATIONS = ("rename", "reorder", "dead_code")
+
+PlantedPair = namedtuple("PlantedPair", ["original", "variant", "transformations"])
+
+_WORDS = ("alpha", "beta", "count", "delta", "value", "total", "index", "limit", "score", "items", "buffer", "result",
+          "offset", "weight", "node", "level", "size", "step", "temp", "cursor", "width", "height", "sum", "flag")
+_SENTENCES = ("The algorithm visits every node once", "Each iteration halves the remaining range",
+              "We store intermediate results in a table", "The loop terminates when the queue is empty",
+              "Sorting the input first simplifies the merge", "A hash map gives constant time lookups",
+              "The recursion depth is bounded by the input size", "Edge cases include empty and single inputs",
+              "Memory use grows linearly with the number of items", "The final answer is printed on one line")
+
+# --- Abstract programs: functions of simple statements, rendered per language ---
+def _identifier(rng, used):
+    while True:
+        name = f"{rng.choice(_WORDS)}_{rng.choice(_WORDS)}" if rng.random() < 0.5 else rng.choice(_WORDS) + str(rng.randint(0, 99))
+        if name not in used:
+            used.add(name)
+            return name
+
+def _expression(rng, names):
+    terms = [rng.choice(names) if names and rng.random() < 0.7 else str(rng.randint(1, 9)) for _ in range(rng.randint(1, 3))]
+    expression = terms[0]
+    for term in terms[1:]: expression += f" {rng.choice('+-*')} {term}"
+    return expression
+
+def _statements(rng, names, used, depth, count):
+    statements = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.15 and depth < 2:
+            counter = _identifier(rng, used)
+            statements.append(("loop", counter, rng.randint(2, 20), _statements(rng, names + [counter], used, depth + 1, rng.randint(1, 3))))
+        elif roll < 0.3 and depth < 2:
+            statements.append(("if", f"{_expression(rng, names)} > {rng.randint(0, 50)}", _statements(rng, names, used, depth + 1, rng.randint(1, 3))))
+        else:
+            target = rng.choice(names) if names and rng.random() < 0.4 else _identifier(rng, used)
+            statements.append(("assign", target, _expression(rng, names)))
+            if target not in names: names = names + [target]
+    return statements
+
+def _function(rng, used, statements):
+    params = [_identifier(rng, used) for _ in range(rng.randint(1, 3))]
+    body = _statements(rng, list(params), used, 0, statements)
+    return {"name": _identifier(rng, used), "params": params, "body": body + [("return", _expression(rng, params))]}
+
+def _program(rng, functions, statements):
+    used = set()
+    return [_function(rng, used, statements) for _ in range(functions)]
+
+def _render_python(program):
+    lines = []
+    def block(statements, indent):
+        for statement in statements:
+            pad = "    " * indent
+            if statement[0] == "assign": lines.append(f"{pad}{statement[1]} = {statement[2]}")
+            elif statement[0] == "return": lines.append(f"{pad}return {statement[1]}")
+            elif statement[0] == "loop":
+                lines.append(f"{pad}for {statement[1]} in range({statement[2]}):"); block(statement[3], indent + 1)
+            else:
+                lines.append(f"{pad}if {statement[1]}:"); block(statement[2], indent + 1)
+    for function in program:
+        lines.append(f"def {function['name']}({', '.join(function['params'])}):")
+        block(function["body"], 1)
+        lines.append("")
+    return "\n".join(lines)
+
+def _render_braces(program, header, footer, signature, indent_base):
+    lines = list(header)
+    def block(statements, indent, declared):
+        pad = "    " * indent
+        for statement in statements:
+            if statement[0] == "assign":
+                prefix = "" if statement[1] in declared else "int "
+                declared.add(statement[1])
+                lines.append(f"{pad}{prefix}{statement[1]} = {statement[2]};")
+            elif statement[0] == "return": lines.append(f"{pad}return {statement[1]};")
+            elif statement[0] == "loop":
+                lines.append(f"{pad}for (int {statement[1]} = 0; {statement[1]} < {statement[2]}; {statement[1]}++) {{")
+                block(statement[3], indent + 1, declared | {statement[1]}); lines.append(f"{pad}}}")
+            else:
+                lines.append(f"{pad}if ({statement[1]}) {{"); block(statement[2], indent + 1, set(declared)); lines.append(f"{pad}}}")
+    for function in program:
+        params = ", ".join(f"int {param}" for param in function["params"])
+        lines.append("    " * indent_base + signature.format(name=function["name"], params=params))
+        block(function["body"], indent_base + 1, set(function["params"]))
+        lines.append("    " * indent_base + "}")
+        lines.append("")
+    return "\n".join(lines + list(footer))
+
+def render(program, language, class_name="Submission"):
+    if language == "python": return _render_python(program)
+    if language == "c": return _render_braces(program, ["#include <stdio.h>", ""], [], "int {name}({params}) {{", 0)
+    if language == "java": return _render_braces(program, [f"public class {class_name} {{", ""], ["}"], "static int {name}({params}) {{", 1)
+    raise ValueError(f"Unknown language: {language}")
+
+# --- Plagiarism transformations ---
+def _rename(program, rng):
+    """Consistently renames every identifier (functions, parameters, variables)."""
+    mapping, used = {}, set()
+    def name(old):
+        if old not in mapping: mapping[old] = _identifier(rng, used) + "_v"
+        return mapping[old]
+    def expression(text):
+        return " ".join(name(token) if token.isidentifier() else token for token in text.split(" "))
+    def statements(block):
+        renamed = []
+        for statement in block:
+            if statement[0] == "assign": renamed.append(("assign", name(statement[1]), expression(statement[2])))
+            elif statement[0] == "return": renamed.append(("return", expression(statement[1])))
+            elif statement[0] == "loop": renamed.append(("loop", name(statement[1]), statement[2], statements(statement[3])))
+            else: renamed.append(("if", expression(statement[1]), statements(statement[2])))
+        return renamed
+    return [{"name": name(function["name"]), "params": [name(param) for param in function["params"]], "body": statements(function["body"])}
+            for function in program]
+
+def _reorder(program, rng):
+    reordered = list(program)
+    rng.shuffle(reordered)
+    return reordered
+
+def _dead_code(program, rng):
+    """Inserts unused assignments into every function body, before its return."""
+    used = set()
+    changed = []
+    for function in program:
+        body = list(function["body"])
+        for _ in range(rng.randint(1, 3)):
+            body.insert(rng.randint(0, len(body) - 1), ("assign", _identifier(rng, used) + "_unused", str(rng.randint(1, 999))))
+        changed.append(dict(function, body=body))
+    return changed
+
+_TRANSFORMS = {"rename": _rename, "reorder": _reorder, "dead_code": _dead_code}
+
+# --- Plain text ---
+def _text_document(rng, paragraphs):
+    return [[rng.choice(_SENTENCES) + f" ({rng.choice(_WORDS)} {rng.randint(1, 99)})." for _ in range(rng.randint(3, 6))]
+            for _ in range(paragraphs)]
+
+def _text_variant(document, rng, transformations):
+    document = [list(paragraph) for paragraph in document]
+    if "rename" in transformations:
+        document = [[sentence.replace(" the ", " this ").replace("We ", "I ") for sentence in paragraph] for paragraph in document]
+    if "reorder" in transformations: rng.shuffle(document)
+    if "dead_code" in transformations:
+        for paragraph in document: paragraph.insert(rng.randint(0, len(paragraph)), "This sentence adds nothing.")
+    return document
+
+def _render_text(document):
+    return "\n\n".join(" ".join(paragraph) for paragraph in document)
+
+def generate_corpus(count, language="python", functions=8, statements=6, plagiarism=0.2, seed=0):
+    """Generates a reproducible corpus of count files: returns ({name: content}, [PlantedPair]).
+
+    About plagiarism * count of the files are variants of an earlier file produced by a random
+    non-empty subset of TRANSFORMATIONS; the rest are independent programs (or documents for
+    "text") with `functions` functions of about `statements` statements each."""
+    if language not in LANGUAGES: raise ValueError(f"Unknown language: {language}")
+    rng = random.Random(seed)
+    files, sources, planted = {}, [], []
+    extension = EXTENSIONS[language]
+    for index in range(count):
+        name = f"student_{index:05d}{extension}"
+        if sources and rng.random() < plagiarism:
+            original_name, original = rng.choice(sources)
+            chosen = tuple(sorted(rng.sample(TRANSFORMATIONS, rng.randint(1, len(TRANSFORMATIONS)))))
+            if language == "text":
+                files[name] = _render_text(_text_variant(original, rng, chosen))
+            else:
+                variant = original
+                for transformation in chosen: variant = _TRANSFORMS[transformation](variant, rng)
+                files[name] = render(variant, language, f"Student{index}")
+            planted.append(PlantedPair(original_name, name, chosen))
+        else:
+            source = _text_document(rng, functions) if language == "text" else _program(rng, functions, statements)
+            files[name] = _render_text(source) if language == "text" else render(source, language, f"Student{index}")
+            sources.append((name, source))
+    return files, planted
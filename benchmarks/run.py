@@ -0,0 +1,159 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError: # Windows
+    RESOURCE_AVAILABLE = False
+
+# --- Local Module Imports ---
+from copy_jikiller.logic import (ScanEngine, normalize_python_code, normalize_c_cpp_code, normalize_java_code,
+                                 text_preprocess, normalize_content, calculate_similarity_fast, backend_available, SCORERS)
+from copy_jikiller.results import SCORE, FILE1, FILE2, as_stored
+from .corpus import LANGUAGES, generate_corpus
+
+NORMALIZERS = {"python": normalize_python_code, "c": normalize_c_cpp_code, "java": normalize_java_code, "text": text_preprocess}
+MODES = {"python": "python", "c": "c", "java": "java", "text": "text"}
+DEFAULT_SCALES = (100, 400, 1000)
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError): return None
+
+def _peak_rss_mb():
+    """Peak resident memory of this process and of its (finished) worker processes, in MiB."""
+    if not RESOURCE_AVAILABLE: return None
+    unit = 1 if sys.platform == "darwin" else 1024 # ru_maxrss is bytes on macOS, KiB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return {"self": round(own / 2**20, 1), "children": round(children / 2**20, 1)}
+
+def _timed(function, memory):
+    """Runs function once for its wall time, then (with memory) once more under tracemalloc, which
+    slows allocation-heavy code, for its peak Python heap use. Returns (result, seconds, peak MiB)."""
+    gc.collect()
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    peak = None
+    if memory:
+        del result; gc.collect()
+        tracemalloc.start()
+        result = function()
+        peak = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+def _rate(count, seconds):
+    return round(count / seconds, 1) if seconds > 0 else None
+
+# --- Stages ---
+def bench_normalize(files, language, memory):
+    normalizer, contents = NORMALIZERS[language], list(files.values())
+    if not backend_available(MODES[language]): # Time the text-token fallback the scan actually uses
+        normalizer = lambda content, mode=MODES[language]: normalize_content(content, mode)
+        normalizer.__name__ = "normalize_content (fallback)"
+    _, elapsed, peak = _timed(lambda: [normalizer(content) for content in contents], memory)
+    size = sum(len(content) for content in contents)
+    return {"stage": "normalize", "function": normalizer.__name__, "files": len(contents), "bytes": size,
+            "seconds": round(elapsed, 4), "files_per_s": _rate(len(contents), elapsed),
+            "mb_per_s": _rate(size / 2**20, elapsed), "peak_mb": peak}
+
+def bench_similarity(files, language, pair_count, seed, memory):
+    mode = MODES[language]
+    tokens = [normalize_content(content, mode) for content in files.values()]
+    rng, n = random.Random(seed), len(tokens)
+    pairs = [tuple(rng.sample(range(n), 2)) for _ in range(pair_count)] if n > 1 else []
+    _, elapsed, peak = _timed(lambda: [calculate_similarity_fast(tokens[i], tokens[j]) for i, j in pairs], memory)
+    return {"stage": "similarity", "function": calculate_similarity_fast.__name__, "pairs": len(pairs),
+            "seconds": round(elapsed, 4), "pairs_per_s": _rate(len(pairs), elapsed), "peak_mb": peak}
+
+def bench_scan(files, planted, language, args):
+    mode = MODES[language]
+    def scan():
+        engine = ScanEngine(mode, workers=args.workers, threshold=args.threshold, scorer=args.scorer, approximate=args.approximate)
+        return engine, engine.run(files)
+    (engine, results), elapsed, peak = _timed(scan, args.memory)
+    stats = engine.stats
+    cut = as_stored(args.threshold)
+    flagged = {(row[FILE1], row[FILE2]) for row in results.ranked() if row[SCORE] >= cut}
+    hits = [tuple(sorted((pair.original, pair.variant))) in flagged for pair in planted]
+    found, by_transformation = sum(hits), {}
+    for pair, hit in zip(planted, hits):
+        for transformation in pair.transformations:
+            counts = by_transformation.setdefault(transformation, [0, 0])
+            counts[0] += hit; counts[1] += 1
+    return {"stage": "scan", "files": stats.get("files", 0), "workers": engine.workers, "scorer": engine.scorer,
+            "approximate": args.approximate, "seconds": round(elapsed, 4),
+            "pairs_total": stats.get("pairs_total", 0), "pairs_scored": stats.get("pairs_scored", 0),
+            "pairs_pruned": stats.get("pairs_pruned", 0), "pairs_per_s": _rate(stats.get("pairs_total", 0), elapsed),
+            "scored_pairs_per_s": _rate(stats.get("pairs_scored", 0), elapsed),
+            "flagged": len(flagged), "planted": len(planted), "planted_found": found,
+            "recall": round(found / len(planted), 4) if planted else None,
+            "recall_by_transformation": {name: round(hit / total, 4) for name, (hit, total) in sorted(by_transformation.items())},
+            "peak_mb": peak}
+
+def run(args):
+    report = {"revision": _git_revision(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "python": platform.python_version(),
+              "platform": platform.platform(), "cpu_count": os.cpu_count(),
+              "config": {key: value for key, value in vars(args).items() if key != "out"}, "results": []}
+    for language in args.languages:
+        if not backend_available(MODES[language]):
+            print(f"[bench] {language}: parser back end not installed, timing the text-token fallback", file=sys.stderr)
+        for scale in args.scales:
+            files, planted = generate_corpus(scale, language, args.functions, args.statements, args.plagiarism, args.seed)
+            entry = {"language": language, "scale": scale, "planted": len(planted), "stages": []}
+            for _ in range(args.repeat):
+                entry["stages"].append(bench_normalize(files, language, args.memory))
+                entry["stages"].append(bench_similarity(files, language, args.pairs, args.seed, args.memory))
+                if scale <= args.max_scan: entry["stages"].append(bench_scan(files, planted, language, args))
+            report["results"].append(entry)
+            for stage in entry["stages"]:
+                rate = stage.get("pairs_per_s") or stage.get("files_per_s")
+                unit = "pairs/s" if "pairs_per_s" in stage else "files/s"
+                print(f"[bench] {language:6} {scale:6,} files  {stage['stage']:10} {stage['seconds']:9.3f}s  {rate or 0:>12,.0f} {unit}", file=sys.stderr)
+    report["peak_rss_mb"] = _peak_rss_mb()
+    return report
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Times normalization, pair scoring and full scans on generated corpora and writes JSON.")
+    parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=["python", "text"], help="Corpus languages (default: python text).")
+    parser.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES), metavar="FILES", help="Corpus sizes in files (default: 100 400 1000).")
+    parser.add_argument("--functions", type=int, default=8, help="Functions (paragraphs for text) per file (default: 8).")
+    parser.add_argument("--statements", type=int, default=6, help="Top-level statements per function (default: 6).")
+    parser.add_argument("--plagiarism", type=float, default=0.2, help="Share of files planted as variants of another (default: 0.2).")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus and sampling seed (default: 0).")
+    parser.add_argument("--pairs", type=int, default=500, help="Random pairs timed with calculate_similarity_fast (default: 500).")
+    parser.add_argument("--max-scan", type=int, default=2000, metavar="FILES", help="Skip end-to-end scans above this corpus size (default: 2000).")
+    parser.add_argument("--workers", type=int, default=0, help="Scan worker processes, 0 = all cores (default: 0).")
+    parser.add_argument("--scorer", choices=SCORERS, default="sequence", help="Scan scorer (default: sequence).")
+    parser.add_argument("--approximate", action="store_true", help="Use MinHash/LSH candidates in the scan.")
+    parser.add_argument("--threshold", type=float, default=0.7, help="Scan threshold as a fraction, also used for planted-pair recall (default: 0.7).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage (default: 1).")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip the extra tracemalloc run per stage.")
+    parser.add_argument("--out", default="-", help="JSON output file, '-' for stdout (default).")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out == "-": print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f: f.write(text + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
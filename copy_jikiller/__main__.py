@@ -0,0 +1,9 @@
+import sys
+import multiprocessing
+
+from .cli import main
+
+if __name__ == "__main__":
+    # Required for the scan engine's process pool in frozen builds
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,20 +1,25 @@
 import os
-import itertools
 import tkinter as tk
 from tkinter import filedialog
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import threading
-import time
 import csv
 import sys
+import time
 
 # --- Local Module Imports (Relative Path) ---
 from .utils import Taskbar, load_settings, save_settings, resource_path
-from .logic import process_content, CLANG_AVAILABLE, JAVALANG_AVAILABLE
-from .ui import DiffWindow, InfoWindow, CustomMessagebox, AddExtensionDialog, ManageExtensionsDialog
+from .logic import ScanEngine, ScanProgress, build_template_index, scan_report, checkpoint_key, CHECKPOINT_SECONDS, backend_available, backend_installed, SCORERS, DEFAULT_MIN_MATCH
+from .results import ResultTable, DEFAULT_TOP_K, SCORE, FILE1, FILE2, GROUP, ESTIMATED, read_result_file
+from .discovery import discover_files, discover_paths, load_files, count_files, read_file, read_archive, FileEntry, ARCHIVE_SEPARATOR
+from .cache import NormalizationCache, PairScoreCache, DEFAULT_CACHE_MAX_MB
+from .ui import DiffWindow, InfoWindow, CustomMessagebox, ConfirmDialog, AddExtensionDialog, ManageExtensionsDialog, VirtualTreeview, ScanStatsWindow
 from .i18n import LANGUAGES
 
+PROGRESS_POLL_MS = 100 # Status bar refresh interval while scanning (10 Hz)
+CLOSE_TIMEOUT_SECONDS = 15 # Longest wait for a running scan to save its checkpoint when the window is closed
+
 class PlagiarismCheckerApp:
     def __init__(self, root):
         self.root = root
@@ -32,9 +37,14 @@ class PlagiarismCheckerApp:
         else:
             self.taskbar = None
             
-        self.scan_start_time = 0
         self.stop_event = threading.Event()
+        self.scan_progress, self.is_scanning, self.engine, self.scan_thread = ScanProgress(), False, None, None
+        self.prepared_template = None # Base-code index built before the scan thread, when a checkpoint had to be checked against it
         self.directory, self.files_content = None, {}
+        self.scan_stats, self.scorer_map = {}, {}
+        self.result_table, self._filter_job = ResultTable(), None
+        self.results_floor, self.scan_summary = None, ""
+        self.template_paths = []
         
         self._load_settings_and_language()
         self._setup_ui()
@@ -108,6 +118,8 @@ class PlagiarismCheckerApp:
         self.select_button.pack(fill=X, pady=(0, 10))
         self.folder_label = ttk.Label(folder_frame, wraplength=250, justify=LEFT)
         self.folder_label.pack(fill=X, anchor="w")
+        self.template_menu = ttk.Menubutton(folder_frame, bootstyle="outline-secondary")
+        self.template_menu.pack(fill=X, pady=(10, 0))
 
         analysis_frame = ttk.Labelframe(self.controls_frame, padding=15)
         analysis_frame.grid(row=0, column=1, sticky="nsew", padx=10)
@@ -118,9 +130,17 @@ class PlagiarismCheckerApp:
         self.mode_selector.pack(fill=X, pady=(0, 10))
         self.mode_selector.bind("<<ComboboxSelected>>", self.on_analysis_mode_selected)
         self.mode_selector.bind("<FocusIn>", self._store_previous_mode)
+        self.scorer_display_name = tk.StringVar()
+        self.scorer_selector = ttk.Combobox(analysis_frame, textvariable=self.scorer_display_name, state="readonly")
+        self.scorer_selector.pack(fill=X, pady=(0, 10))
         self.recursive_var = tk.BooleanVar(value=True)
         self.recursive_check = ttk.Checkbutton(analysis_frame, variable=self.recursive_var)
         self.recursive_check.pack(fill=X, anchor="w")
+        self.approximate_var = tk.BooleanVar(value=False)
+        self.approximate_check = ttk.Checkbutton(analysis_frame, variable=self.approximate_var)
+        self.approximate_check.pack(fill=X, anchor="w", pady=(5, 0))
+        self.clear_cache_button = ttk.Button(analysis_frame, command=self.clear_cache, bootstyle="link", padding=(0, 5, 0, 0))
+        self.clear_cache_button.pack(anchor="w")
         
         filter_frame = ttk.Labelframe(self.controls_frame, padding=15)
         filter_frame.grid(row=0, column=2, sticky="nsew", padx=(10, 0))
@@ -147,7 +167,7 @@ class PlagiarismCheckerApp:
         self.threshold_prefix_label = ttk.Label(threshold_frame)
         self.threshold_prefix_label.pack(side=LEFT)
         self.threshold_var = tk.DoubleVar(value=70)
-        self.threshold_scale = ttk.Scale(threshold_frame, from_=0, to=100, variable=self.threshold_var, orient=HORIZONTAL, command=lambda e: self.threshold_value_label.config(text=f"{int(self.threshold_var.get())}%"))
+        self.threshold_scale = ttk.Scale(threshold_frame, from_=0, to=100, variable=self.threshold_var, orient=HORIZONTAL, command=self.on_threshold_changed)
         self.threshold_scale.pack(side=LEFT, fill=X, expand=YES, padx=5)
         self.threshold_value_label = ttk.Label(threshold_frame, text="70%", font="-size 11 -weight bold", width=4)
         self.threshold_value_label.pack(side=LEFT)
@@ -164,16 +184,36 @@ class PlagiarismCheckerApp:
         self.stop_button.pack(side=LEFT, padx=(0,10))
         self.export_button = ttk.Button(buttons_subframe, command=self.export_to_csv, bootstyle="info", padding=(10,5), state=DISABLED)
         self.export_button.pack(side=LEFT)
+        self.load_results_button = ttk.Button(buttons_subframe, command=self.load_results, bootstyle="info-outline", padding=(10,5))
+        self.load_results_button.pack(side=LEFT, padx=(10,0))
+        self.details_button = ttk.Button(buttons_subframe, command=self.show_scan_details, bootstyle="info-outline", padding=(10,5), state=DISABLED)
+        self.details_button.pack(side=LEFT, padx=(10,0))
         
     def _create_results_view(self, parent):
         result_frame = ttk.Frame(parent)
         result_frame.grid(row=3, column=0, sticky="nsew")
-        result_frame.rowconfigure(0, weight=1); result_frame.columnconfigure(0, weight=1)
-        self.tree = ttk.Treeview(result_frame, columns=("File1", "File2", "Similarity"), show='headings', bootstyle="secondary", height=15)
-        self.tree.bind("<Double-1>", self.on_item_double_click)
-        tree_scrollbar = ttk.Scrollbar(result_frame, orient=VERTICAL, command=self.tree.yview, bootstyle="secondary-round")
-        self.tree.configure(yscroll=tree_scrollbar.set)
-        self.tree.grid(row=0, column=0, sticky="nsew"); tree_scrollbar.grid(row=0, column=1, sticky="ns")
+        result_frame.rowconfigure(1, weight=1); result_frame.columnconfigure(0, weight=1)
+
+        # --- Result filters (applied to the in-memory table, never to widgets) ---
+        result_filter_frame = ttk.Frame(result_frame)
+        result_filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        self.name_filter_var, self.min_score_var, self.max_score_var = tk.StringVar(), tk.StringVar(value="0"), tk.StringVar(value="100")
+        self.name_filter_label = ttk.Label(result_filter_frame); self.name_filter_label.pack(side=LEFT)
+        ttk.Entry(result_filter_frame, textvariable=self.name_filter_var, width=30).pack(side=LEFT, padx=(5, 15))
+        self.score_range_label = ttk.Label(result_filter_frame); self.score_range_label.pack(side=LEFT)
+        ttk.Spinbox(result_filter_frame, from_=0, to=100, textvariable=self.min_score_var, width=5).pack(side=LEFT, padx=5)
+        ttk.Label(result_filter_frame, text="~").pack(side=LEFT)
+        ttk.Spinbox(result_filter_frame, from_=0, to=100, textvariable=self.max_score_var, width=5).pack(side=LEFT, padx=5)
+        self.result_count_var = tk.StringVar()
+        ttk.Label(result_filter_frame, textvariable=self.result_count_var).pack(side=RIGHT)
+        for var in (self.name_filter_var, self.min_score_var, self.max_score_var):
+            var.trace_add("write", self._schedule_result_filter)
+
+        columns = [("File1", FILE1, False), ("File2", FILE2, False), ("Similarity", SCORE, True), ("Group", GROUP, True)]
+        self.results_view = VirtualTreeview(result_frame, self.result_table, columns, self._format_result_row, height=15, bootstyle="secondary")
+        self.results_view.tree.column("Group", width=120, stretch=False)
+        self.results_view.tree.bind("<Double-1>", self.on_item_double_click)
+        self.results_view.grid(row=1, column=0, sticky="nsew")
 
     def _create_statusbar(self, parent):
         bottom_frame = ttk.Frame(parent)
@@ -186,7 +226,19 @@ class PlagiarismCheckerApp:
     def on_closing(self):
         self.settings["extensions"] = {ext: var.get() for ext, var in self.extension_vars.items()}
         save_settings(self.settings)
-        self.root.destroy()
+        if self.is_scanning and self.scan_thread is not None:
+            # Stop the scan and let it write its checkpoint; Tk keeps running so its callbacks don't block
+            self.stop_event.set()
+            self.progress_text_var.set(self.texts["status_saving_checkpoint"])
+            self._close_when_stopped(time.monotonic() + CLOSE_TIMEOUT_SECONDS)
+        else:
+            self.root.destroy()
+
+    def _close_when_stopped(self, deadline):
+        if self.scan_thread.is_alive() and time.monotonic() < deadline:
+            self.root.after(PROGRESS_POLL_MS, self._close_when_stopped, deadline)
+        else:
+            self.root.destroy()
         
     def change_theme(self, event=None):
         display_name = self.theme_display_name.get()
@@ -214,9 +266,8 @@ class PlagiarismCheckerApp:
         for key in ["text", "python", "c", "java"]:
             if key in self.analysis_map:
                 name = self.analysis_map[key]
-                if key == 'c' and not CLANG_AVAILABLE:
-                    display_options.append(name + unavailable_suffix)
-                elif key == 'java' and not JAVALANG_AVAILABLE:
+                # Only checks that the parser package is installed; it is imported when the mode is chosen
+                if key in ('c', 'java') and not backend_installed(key):
                     display_options.append(name + unavailable_suffix)
                 else:
                     display_options.append(name)
@@ -225,14 +276,25 @@ class PlagiarismCheckerApp:
         current_internal_mode = self.get_internal_analysis_mode()
         self.analysis_mode_display_name.set(self.analysis_map.get(current_internal_mode, display_options[0]))
 
+        current_scorer = self.get_internal_scorer()
+        self.scorer_map = self.texts["scorer_display_names"]
+        self.scorer_selector["values"] = [self.scorer_map[key] for key in SCORERS]
+        self.scorer_display_name.set(self.scorer_map[current_scorer])
+
         self.theme_label.config(text=self.texts["theme_label"]); self.lang_label.config(text=self.texts["lang_label"])
         self.folder_title_label.config(text=self.texts["folder_title"]); self.select_button.config(text=self.texts["select_button"])
-        self.folder_label.config(text=self.texts["folder_label"]); self.analysis_title_label.config(text=self.texts["analysis_title"])
-        self.recursive_check.config(text=self.texts["recursive_check"]); self.filter_title_label.config(text=self.texts["filter_title"])
+        self.folder_label.config(text=self.texts["folder_label"]); self._build_template_menu()
+        self.analysis_title_label.config(text=self.texts["analysis_title"])
+        self.recursive_check.config(text=self.texts["recursive_check"]); self.approximate_check.config(text=self.texts["approximate_check"])
+        self.clear_cache_button.config(text=self.texts["clear_cache_button"])
+        self.filter_title_label.config(text=self.texts["filter_title"])
         self.extensions_menu.config(text=self.texts["extensions_menu"]); self.threshold_prefix_label.config(text=self.texts["threshold_prefix_label"])
         self.scan_button.config(text=self.texts["scan_button"]); self.stop_button.config(text=self.texts["stop_button"])
-        self.export_button.config(text=self.texts["export_button"]); self.progress_text_var.set(self.texts["status_ready"])
-        self.tree.heading("File1", text=self.texts["tree_file1"]); self.tree.heading("File2", text=self.texts["tree_file2"]); self.tree.heading("Similarity", text=self.texts["tree_similarity"])
+        self.export_button.config(text=self.texts["export_button"]); self.details_button.config(text=self.texts["details_button"]); self.load_results_button.config(text=self.texts["load_results_button"]); self.progress_text_var.set(self.texts["status_ready"])
+        self.results_view.set_heading("File1", self.texts["tree_file1"]); self.results_view.set_heading("File2", self.texts["tree_file2"]); self.results_view.set_heading("Similarity", self.texts["tree_similarity"])
+        self.results_view.set_heading("Group", self.texts["tree_group"])
+        self.name_filter_label.config(text=self.texts["results_filter_label"]); self.score_range_label.config(text=self.texts["results_score_label"])
+        self._update_result_count()
         self._build_extensions_menu() 
 
     def toggle_theme_styles(self):
@@ -246,20 +308,33 @@ class PlagiarismCheckerApp:
         button_style = "light" if is_dark else "primary"
 
         self.scan_button.config(bootstyle=scan_style); self.stop_button.config(bootstyle=stop_style); self.progress_bar.config(bootstyle=f"{scan_style}-striped")
-        self.recursive_check.config(bootstyle=f"{scan_style}-round-toggle"); self.threshold_scale.config(bootstyle=scan_style); self.select_button.config(bootstyle=button_style)
-        self.info_button.config(bootstyle="link")
+        self.recursive_check.config(bootstyle=f"{scan_style}-round-toggle"); self.approximate_check.config(bootstyle=f"{scan_style}-round-toggle")
+        self.threshold_scale.config(bootstyle=scan_style); self.select_button.config(bootstyle=button_style)
+        self.info_button.config(bootstyle="link"); self.clear_cache_button.config(bootstyle="link")
 
     def show_info_window(self):
         InfoWindow(self.root, self.texts)
+
+    def show_scan_details(self):
+        if self.scan_stats:
+            ScanStatsWindow(self.root, self.texts, scan_report(self.scan_stats), self.engine.profiler if self.engine else None)
     
     def on_item_double_click(self, event):
-        item_id = self.tree.identify_row(event.y)
-        if not item_id: return
-        item_values = self.tree.item(item_id, "values")
-        file1_name, file2_name = item_values[0], item_values[1]
-        content1, content2 = self.files_content.get(file1_name, ""), self.files_content.get(file2_name, "")
+        row = self.results_view.row_at(event.y)
+        if not row: return
+        file1_name, file2_name = row[FILE1], row[FILE2]
+        content1, content2 = self._file_content(file1_name), self._file_content(file2_name)
         DiffWindow(self.root, os.path.join(self.directory, file1_name), os.path.join(self.directory, file2_name), content1, content2)
 
+    def _file_content(self, name):
+        # Results opened from a file come without contents, so those are read back from the scanned folder
+        if name in self.files_content: return self.files_content[name]
+        if ARCHIVE_SEPARATOR in name:
+            archive = name.split(ARCHIVE_SEPARATOR, 1)[0]
+            members = read_archive(FileEntry(archive, os.path.join(self.directory, archive), 0, 0), [os.path.splitext(name)[1]])
+            return next((content for entry, content in members if entry.name == name), "")
+        return read_file(FileEntry(name, os.path.join(self.directory, name), 0, 0)) or ""
+
     def select_folder(self):
         title = self.texts.get("dialog_select_folder", "Select Folder")
         directory = filedialog.askdirectory(title=title)
@@ -269,12 +344,22 @@ class PlagiarismCheckerApp:
             self.folder_label.config(text=f"{self.texts['folder_prefix']}: {directory}")
             self.extensions_menu.config(state=DISABLED)
             self.recursive_check.config(state=DISABLED)
-            try:
-                extensions = [ext for ext, var in self.extension_vars.items() if var.get()]
-                file_count = len(self._get_files_from_directory(self.directory, extensions, self.recursive_var.get()))
-                self.progress_text_var.set(self.texts["status_file_count"].format(count=file_count))
-            except Exception as e:
-                self.progress_text_var.set(self.texts["status_error_reading"].format(error=e))
+            extensions = [ext for ext, var in self.extension_vars.items() if var.get()]
+            threading.Thread(target=self._count_files, args=(directory, extensions, self.recursive_var.get()), daemon=True).start()
+
+    def _count_files(self, directory, extensions, recursive):
+        # Only walks the tree (paths and stat results); contents are read during the scan
+        try:
+            file_count, archive_count = count_files(directory, extensions, recursive)
+            text = self.texts["status_file_count"].format(count=file_count)
+            if archive_count: text += self.texts["status_archive_count"].format(count=archive_count)
+        except Exception as e:
+            text = self.texts["status_error_reading"].format(error=e)
+        self.root.after(0, self._show_file_count, directory, text)
+
+    def _show_file_count(self, directory, text):
+        # The folder may have changed or a scan started while counting
+        if self.directory == directory and not self.is_scanning: self.progress_text_var.set(text)
                 
     def add_extension(self):
         dialog = AddExtensionDialog(self.root, self.texts)
@@ -301,6 +386,29 @@ class PlagiarismCheckerApp:
             menu.add_checkbutton(label=ext, variable=var, command=self._on_toggle_extension)
         self.extensions_menu['menu'] = menu
 
+    def _build_template_menu(self):
+        menu = tk.Menu(self.template_menu, tearoff=0)
+        menu.add_command(label=self.texts["template_add_files"], command=self.add_template_files)
+        menu.add_command(label=self.texts["template_add_folder"], command=self.add_template_folder)
+        menu.add_separator()
+        menu.add_command(label=self.texts["template_clear"], command=self.clear_templates, state=NORMAL if self.template_paths else DISABLED)
+        self.template_menu['menu'] = menu
+        self.template_menu.config(text=self.texts["template_menu"].format(count=len(self.template_paths)))
+
+    def add_template_files(self):
+        paths = filedialog.askopenfilenames(title=self.texts["template_add_files"])
+        self.template_paths.extend(path for path in paths if path not in self.template_paths)
+        self._build_template_menu()
+
+    def add_template_folder(self):
+        path = filedialog.askdirectory(title=self.texts["template_add_folder"])
+        if path and path not in self.template_paths: self.template_paths.append(path)
+        self._build_template_menu()
+
+    def clear_templates(self):
+        self.template_paths = []
+        self._build_template_menu()
+
     def _on_toggle_all_extensions(self):
         for var in self.extension_vars.values(): var.set(self.all_extensions_var.get())
             
@@ -313,10 +421,10 @@ class PlagiarismCheckerApp:
     def on_analysis_mode_selected(self, event):
         selected_display = self.analysis_mode_display_name.get()
         unavailable_suffix = self.texts.get("unavailable_suffix", " (N/A)")
-        if selected_display.endswith(unavailable_suffix):
-            original_display_name = selected_display.replace(unavailable_suffix, "")
-            internal_mode = next((k for k, v in self.analysis_map.items() if v == original_display_name), None)
-            
+        original_display_name = selected_display.replace(unavailable_suffix, "")
+        internal_mode = next((k for k, v in self.analysis_map.items() if v == original_display_name), None)
+        # First use of a language mode loads its parser (and locates libclang for C/C++)
+        if selected_display.endswith(unavailable_suffix) or not backend_available(internal_mode):
             msg_key = "dialog_clang_unavailable" if internal_mode == 'c' else "dialog_javalang_unavailable"
             CustomMessagebox(self.root, self.texts, self.texts.get(msg_key), title_key="dialog_warning_title", bootstyle="warning")
             
@@ -328,27 +436,94 @@ class PlagiarismCheckerApp:
         if not filepath: return
         try:
             with open(filepath, "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.writer(f); writer.writerow([self.texts["tree_file1"], self.texts["tree_file2"], self.texts["tree_similarity"]])
-                for item_id in self.tree.get_children(): writer.writerow(self.tree.item(item_id, "values"))
+                writer = csv.writer(f); writer.writerow([self.texts["tree_file1"], self.texts["tree_file2"], self.texts["tree_similarity"], self.texts["tree_group"]])
+                for row in self.result_table: writer.writerow(self._format_result_row(row))
             CustomMessagebox(self.root, self.texts, self.texts["dialog_export_success"].format(file=os.path.basename(filepath)), title_key="dialog_success_title", bootstyle="success")
         except Exception as e:
             CustomMessagebox(self.root, self.texts, self.texts["dialog_export_error"].format(error=e), title_key="dialog_error_title", bootstyle="error")
 
+    def load_results(self):
+        # Results files come from `scan --results` or from merging the shards of a distributed scan
+        title = self.texts.get("dialog_load_results", "Open Results")
+        filepath = filedialog.askopenfilename(filetypes=[("JSON", "*.json")], title=title)
+        if not filepath: return
+        try:
+            meta, rows = read_result_file(filepath)
+        except Exception as e:
+            CustomMessagebox(self.root, self.texts, self.texts["dialog_results_error"].format(error=e), title_key="dialog_error_title", bootstyle="error"); return
+        if meta.get("shard"):
+            CustomMessagebox(self.root, self.texts, self.texts["dialog_results_shard"].format(shard="/".join(map(str, meta["shard"]))), title_key="dialog_warning_title", bootstyle="warning"); return
+
+        self.directory, self.files_content, self.engine = meta.get("directory", ""), {}, None
+        self.folder_label.config(text=f"{self.texts['folder_prefix']}: {self.directory}")
+        if os.path.isdir(self.directory): self.scan_button.config(state=NORMAL)
+        self.scan_stats = meta.get("stats") or None
+        self.result_table.set_rows(rows)
+        self.result_table.set_threshold(self.threshold_var.get() / 100)
+        self.results_floor = meta.get("complete_from", 0.0)
+        self.results_view.reset()
+        self._show_result_rows()
+        self.scan_summary = self.texts["status_results_loaded"].format(count=len(rows), file=os.path.basename(filepath))
+        if self.scan_stats: self.scan_summary += " " + self._format_summary(self.scan_stats)
+        self.progress_text_var.set(self.scan_summary)
+        self.details_button.config(state=NORMAL if self.scan_stats else DISABLED)
+
+    def _open_cache(self):
+        return NormalizationCache(max_mb=self.settings.get("cache_max_mb", DEFAULT_CACHE_MAX_MB))
+
+    def clear_cache(self):
+        try:
+            self._open_cache().clear()
+            PairScoreCache().clear()
+            CustomMessagebox(self.root, self.texts, self.texts["dialog_cache_cleared"], title_key="dialog_success_title", bootstyle="success")
+        except Exception as e:
+            CustomMessagebox(self.root, self.texts, self.texts["dialog_cache_error"].format(error=e), title_key="dialog_error_title", bootstyle="error")
+
     def start_scan_thread(self):
         if not self.directory:
             CustomMessagebox(self.root, self.texts, self.texts["dialog_no_folder"], title_key="dialog_warning_title", bootstyle="warning"); return
-            
-        for i in self.tree.get_children(): self.tree.delete(i)
+        self.prepared_template = None
+        self._offer_resume()
+
+        self.result_table.clear(); self.result_table.set_threshold(self.threshold_var.get() / 100)
+        self.results_view.reset(); self._update_result_count()
+        self.results_floor = None
         
         self.scan_button.config(state=DISABLED); self.stop_button.config(state=NORMAL)
-        self.select_button.config(state=DISABLED); self.export_button.config(state=DISABLED)
-        self.mode_selector.config(state=DISABLED); self.extensions_menu.config(state=DISABLED); self.recursive_check.config(state=DISABLED)
+        self.select_button.config(state=DISABLED); self.export_button.config(state=DISABLED); self.details_button.config(state=DISABLED); self.load_results_button.config(state=DISABLED)
+        self.mode_selector.config(state=DISABLED); self.scorer_selector.config(state=DISABLED); self.extensions_menu.config(state=DISABLED); self.recursive_check.config(state=DISABLED)
+        self.approximate_check.config(state=DISABLED); self.clear_cache_button.config(state=DISABLED); self.template_menu.config(state=DISABLED)
         
-        self.progress_bar['value'], self.scan_start_time = 0, 0
+        self.progress_bar['value'] = 0
+        self.scan_progress, self.is_scanning, self.engine = ScanProgress(), True, None
+        self.root.after(PROGRESS_POLL_MS, self._poll_progress)
+        self.scan_stats = {}
         self.stop_event.clear()
         if self.taskbar: self.taskbar.setProgressState(self.taskbar.TBPF_NORMAL)
         
-        threading.Thread(target=self.run_scan, daemon=True).start()
+        self.scan_thread = threading.Thread(target=self.run_scan, daemon=True)
+        self.scan_thread.start()
+
+    def _offer_resume(self):
+        # An interrupted scan of the same folder, mode and scorer left its scores in the cache; reusing them resumes it
+        key = checkpoint_key(os.path.abspath(self.directory), self.get_internal_analysis_mode(), self.get_internal_scorer())
+        try:
+            score_cache = PairScoreCache()
+            saved = score_cache.checkpoint(key)
+            if saved is None: return
+            # Scores saved under other settings (GST min match, base code...) would not be reused, so there is nothing to resume
+            if self.template_paths: self.prepared_template = self._build_template(key[1])
+            scope = ScanEngine(key[1], score_cache=score_cache, scope=key[0], scorer=key[2], min_match=self.settings.get("gst_min_match", DEFAULT_MIN_MATCH),
+                               template=self.prepared_template).score_scope()
+            if saved["scope"] != scope: return
+            message = self.texts["dialog_resume_msg"].format(saved=time.strftime("%Y-%m-%d %H:%M", time.localtime(saved["saved"])),
+                                                             done=saved["pairs_done"], total=saved["pairs_total"])
+            dialog = ConfirmDialog(self.root, self.texts, message, title_key="dialog_resume_title", confirm_key="dialog_resume", cancel_key="dialog_start_over")
+            self.root.wait_window(dialog)
+            # Starting over only drops the checkpoint; the scores it saved are still reused like any cached score
+            if not dialog.result: score_cache.clear_checkpoint(key)
+        except Exception as e:
+            print(f"Checkpoint read error: {e}")
         
     def stop_scan(self):
         self.stop_event.set(); self.stop_button.config(state=DISABLED)
@@ -357,46 +532,71 @@ class PlagiarismCheckerApp:
         selected_display_name = self.analysis_mode_display_name.get()
         return next((k for k, v in self.analysis_map.items() if v == selected_display_name), 'text')
 
+    def get_internal_scorer(self):
+        selected_display_name = self.scorer_display_name.get()
+        return next((k for k, v in self.scorer_map.items() if v == selected_display_name), 'sequence')
+
     def run_scan(self):
         try:
             extensions = [ext for ext, var in self.extension_vars.items() if var.get()]
-            self.files_content = self._get_files_from_directory(self.directory, extensions, self.recursive_var.get())
-            
-            if len(self.files_content) < 2:
+            self.files_content = {}
+            mode = self.get_internal_analysis_mode()
+            template = self.prepared_template
+            if template is None and self.template_paths: template = self._build_template(mode)
+            self.engine = engine = ScanEngine(mode, workers=self.settings.get("workers", 0), stop_event=self.stop_event, progress=self.scan_progress,
+                                            approximate=self.approximate_var.get(), threshold=self.threshold_var.get() / 100, cache=self._open_cache(),
+                                            score_cache=PairScoreCache(), scope=os.path.abspath(self.directory),
+                                            scorer=self.get_internal_scorer(), min_match=self.settings.get("gst_min_match", DEFAULT_MIN_MATCH),
+                                            top_k=self.settings.get("top_k", DEFAULT_TOP_K), template=template,
+                                            profile=self.settings.get("profile_scans", False), max_file_size=self.settings.get("max_file_kb", 0) * 1024,
+                                            pair_budget=self.settings.get("pair_time_budget", 0),
+                                            checkpoint_seconds=self.settings.get("checkpoint_seconds", CHECKPOINT_SECONDS))
+            results = engine.run(self._load_files(self.directory, extensions, self.recursive_var.get()))
+            self.scan_stats = engine.stats
+            if results is None: self.root.after(0, self.scan_finished, True); return
+            if engine.stats["files"] < 2:
                 self.root.after(0, lambda: CustomMessagebox(self.root, self.texts, self.texts["status_no_files"], title_key="dialog_info_title", bootstyle="info"))
-                self.root.after(0, self.scan_finished, False); return
-
-            comparisons, file_pairs = [], list(itertools.combinations(self.files_content.keys(), 2))
-            total_comparisons, mode = len(file_pairs), self.get_internal_analysis_mode()
-            self.progress_bar['maximum'] = total_comparisons
-            
-            self.root.after(0, self.update_progress, 0, total_comparisons)
-            self.scan_start_time = time.time()
-
-            for i, (file1_name, file2_name) in enumerate(file_pairs):
-                if self.stop_event.is_set(): self.root.after(0, self.scan_finished, True); return
-                
-                content1, content2 = self.files_content[file1_name], self.files_content[file2_name]
-                similarity = process_content(content1, content2, mode)
-                comparisons.append((similarity, file1_name, file2_name))
-                self.root.after(0, self.update_progress, i + 1, total_comparisons)
+                return
             
-            comparisons.sort(reverse=True)
-            self.root.after(0, self.update_results, comparisons)
+            self.root.after(0, self.update_results, results)
         except Exception as e:
             self.root.after(0, lambda: CustomMessagebox(self.root, self.texts, self.texts["dialog_scan_error"].format(error=e), title_key="dialog_error_title", bootstyle="error"))
         finally:
              if not self.stop_event.is_set():
                 self.root.after(0, self.scan_finished, False)
              
-    def update_progress(self, current, total):
+    def _build_template(self, mode):
+        # Base code is normalized once per scan; matching regions are stripped from every file
+        extensions = [ext for ext, var in self.extension_vars.items() if var.get()]
+        return build_template_index((content for _, content in load_files(discover_paths(self.template_paths, extensions), extensions)), mode)
+
+    def _load_files(self, directory, extensions, recursive):
+        # Files stream into the engine while the walk and the threaded reads are still going
+        for entry, content in load_files(discover_files(directory, extensions, recursive), extensions):
+            self.files_content[entry.name] = content
+            yield entry.name, content
+
+    def _poll_progress(self):
+        # Runs on the Tk thread at a fixed rate; the scan thread only bumps a shared counter
+        if not self.is_scanning: return
+        self.update_progress(*self.scan_progress.snapshot())
+        self._stream_results()
+        self.root.after(PROGRESS_POLL_MS, self._poll_progress)
+
+    def update_progress(self, current, total, rate=None):
+        if total == 0 and self.scan_progress.files:
+            # Still discovering and normalizing; the pair count is not known yet
+            self.progress_bar.config(mode='indeterminate'); self.progress_bar.step()
+            self.progress_text_var.set(self.texts["status_loading_files"].format(count=self.scan_progress.files))
+            return
+        self.progress_bar.config(mode='determinate')
+        self.progress_bar['maximum'] = max(total, 1)
         self.progress_bar['value'] = current
         if self.taskbar: self.taskbar.setProgressValue(current, total)
         progress_percent = (current / total) * 100 if total > 0 else 0
         
-        if current > 0 and self.scan_start_time > 0:
-            elapsed_time = time.time() - self.scan_start_time
-            eta_seconds = (elapsed_time / current) * (total - current)
+        eta_seconds = self.scan_progress.eta_seconds(current, total, rate)
+        if current > 0 and eta_seconds is not None:
             eta_str = f"{int(eta_seconds // 60)}m {int(eta_seconds % 60)}s"
             self.progress_text_var.set(self.texts["status_scanning"].format(percent=progress_percent, current=current, total=total, eta=eta_str))
         elif total > 0:
@@ -404,43 +604,96 @@ class PlagiarismCheckerApp:
         else:
             self.progress_text_var.set(self.texts["status_no_files"])
             
-    def update_results(self, comparisons):
+    def _stream_results(self):
+        # Show above-threshold pairs as soon as they are scored; update_results sorts them at the end
+        results = self.engine.results if self.engine else None
+        if results is None: return
+        rows = results.take_new()
+        if not rows: return
+        self.result_table.extend(rows)
+        self._show_result_rows()
+
+    def update_results(self, results):
+        # Keep the below-threshold top slice too, so the threshold slider can re-filter without a rescan
+        self.result_table.set_rows(results.ranked(include_below=True))
+        self.result_table.set_threshold(self.threshold_var.get() / 100)
+        self.results_floor = results.complete_from()
+        self.results_view.reset()
+        self._show_result_rows()
+
+    def on_threshold_changed(self, event=None):
         threshold = self.threshold_var.get() / 100
-        for similarity, file1, file2 in comparisons:
-            if similarity >= threshold:
-                self.tree.insert("", END, values=(file1, file2, f"{similarity * 100:.2f}"))
-        if self.tree.get_children():
+        self.threshold_value_label.config(text=f"{int(self.threshold_var.get())}%")
+        self.result_table.set_threshold(threshold)
+        self.results_view.reset()
+        self._update_result_count()
+        if self.is_scanning or self.results_floor is None: return
+        if threshold < self.results_floor:
+            self.progress_text_var.set(self.texts["status_rescan_hint"].format(floor=self.results_floor * 100))
+        elif self.scan_summary:
+            self.progress_text_var.set(self.scan_summary)
+
+    def _show_result_rows(self):
+        self.results_view.refresh()
+        self._update_result_count()
+        if self.result_table.rows:
             self.export_button.config(state=NORMAL)
 
+    def _format_result_row(self, row):
+        group = self.texts["duplicate_group"].format(group=row[GROUP]) if row[GROUP] else ""
+        # Estimated scores (over the pair time budget or the file size cap) are marked with ≈
+        return row[FILE1], row[FILE2], f"{'≈ ' if row[ESTIMATED] else ''}{row[SCORE] * 100:.2f}", group
+
+    def _update_result_count(self):
+        self.result_count_var.set(self.texts["results_count"].format(shown=len(self.result_table), total=self.result_table.passing()))
+
+    def _schedule_result_filter(self, *args):
+        # Debounce typing; refiltering is a single pass over the in-memory rows
+        if self._filter_job: self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(150, self.apply_result_filter)
+
+    def apply_result_filter(self):
+        self._filter_job = None
+        def percent(var, default):
+            try: return min(max(float(var.get()), 0.0), 100.0) / 100
+            except ValueError: return default
+        self.result_table.set_filter(self.name_filter_var.get(), percent(self.min_score_var, 0.0), percent(self.max_score_var, 1.0))
+        self.results_view.reset()
+        self._update_result_count()
+
     def scan_finished(self, was_cancelled):
+        self.is_scanning = False
         self.scan_button.config(state=NORMAL); self.select_button.config(state=NORMAL); self.stop_button.config(state=DISABLED)
-        self.mode_selector.config(state="readonly"); self.extensions_menu.config(state=NORMAL); self.recursive_check.config(state=NORMAL)
+        self.mode_selector.config(state="readonly"); self.scorer_selector.config(state="readonly"); self.extensions_menu.config(state=NORMAL); self.recursive_check.config(state=NORMAL)
+        self.approximate_check.config(state=NORMAL); self.clear_cache_button.config(state=NORMAL); self.template_menu.config(state=NORMAL)
+        self.load_results_button.config(state=NORMAL)
         
         if self.taskbar:
             if was_cancelled: self.taskbar.setProgressState(self.taskbar.TBPF_PAUSED)
             else: self.taskbar.setProgressState(self.taskbar.TBPF_NOPROGRESS)
         
-        self.progress_text_var.set(self.texts["status_scan_cancelled"] if was_cancelled else self.texts["status_scan_done"])
-        
-    def _get_files_from_directory(self, directory, extensions, recursive):
-        file_data = {}
-        if not extensions: 
-            return file_data 
-            
-        if recursive:
-            for dirpath, _, filenames in os.walk(directory):
-                for filename in filenames:
-                    if not filename.startswith('.') and (any(filename.endswith(ext) for ext in extensions)):
-                        filepath = os.path.join(dirpath, filename)
-                        try:
-                            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                                file_data[os.path.relpath(filepath, directory)] = f.read()
-                        except Exception as e: print(f"File read error '{filepath}': {e}")
+        self.scan_summary = ""
+        if was_cancelled:
+            self.progress_text_var.set(self.texts["status_scan_cancelled"])
+        elif self.scan_stats:
+            self.scan_summary = self._format_summary(self.scan_stats)
+            self.progress_text_var.set(self.scan_summary)
+            self.details_button.config(state=NORMAL)
         else:
-            for filename in os.listdir(directory):
-                filepath = os.path.join(directory, filename)
-                if os.path.isfile(filepath) and not filename.startswith('.') and (any(filename.endswith(ext) for ext in extensions)):
-                    try:
-                        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f: file_data[filename] = f.read()
-                    except Exception as e: print(f"File read error '{filename}': {e}")
-        return file_data
+            self.progress_text_var.set(self.texts["status_scan_done"])
+
+    def _format_summary(self, stats):
+        summary = self.texts["status_scan_summary"].format(scored=stats.get("pairs_scored", 0), reused=stats.get("pairs_reused", 0), pruned=stats.get("pairs_pruned", 0))
+        if stats.get("prefilter_length") or stats.get("prefilter_histogram"):
+            summary += self.texts["status_prefilter"].format(length=stats["prefilter_length"], histogram=stats["prefilter_histogram"])
+        if stats.get("template_files"):
+            summary += self.texts["status_template"].format(files=stats["template_files"], tokens=stats["template_tokens"])
+        if stats.get("duplicate_groups"):
+            summary += self.texts["status_duplicates"].format(files=stats["duplicate_files"], groups=stats["duplicate_groups"])
+        if stats.get("resumed"):
+            summary += self.texts["status_resumed"]
+        if stats.get("pairs_estimated"):
+            summary += self.texts["status_estimated"].format(count=stats["pairs_estimated"])
+        if "lsh_recall" in stats:
+            summary += self.texts["status_lsh_recall"].format(recall=stats["lsh_recall"] * 100)
+        return summary
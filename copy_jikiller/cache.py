@@ -0,0 +1,171 @@
+import os
+import time
+import zlib
+import array
+import sqlite3
+import hashlib
+import contextlib
+
+CACHE_FILE = "jikiller_cache.sqlite3"
+DEFAULT_CACHE_MAX_MB = 256
+_EVICT_TARGET_RATIO = 0.9 # Evict down to this share of the limit so every insert doesn't trigger eviction
+MAX_SCORE_SCOPES = 50 # Folder/mode combinations whose pair scores are kept for incremental rescans
+
+def content_hash(content):
+    """SHA-256 of a file's text content, used as its content address."""
+    return hashlib.sha256(content.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+def _pack_fingerprints(fingerprints):
+    return array.array('Q', sorted(fingerprints)).tobytes()
+
+def _unpack_fingerprints(blob):
+    values = array.array('Q')
+    values.frombytes(blob)
+    return set(values)
+
+@contextlib.contextmanager
+def _connect(path):
+    """Opens a short-lived connection (one per call, so any thread may use the cache) and commits on success."""
+    directory = os.path.dirname(path)
+    if directory: os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with conn: yield conn
+    finally:
+        conn.close()
+
+class NormalizationCache:
+    """Content-addressed on-disk cache of normalized artifacts and their fingerprints.
+
+    Entries are keyed by content hash + analysis mode + normalizer version, stored as
+    zlib-compressed text and packed uint64 fingerprints in SQLite, and evicted least
+    recently used first once the total size exceeds max_mb."""
+    def __init__(self, path=CACHE_FILE, max_mb=DEFAULT_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = max(1, int(max_mb)) * 1024 * 1024
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS artifacts (
+                key TEXT PRIMARY KEY, processed BLOB, fingerprints BLOB, size INTEGER, last_used REAL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS artifacts_lru ON artifacts (last_used)")
+
+    def _connect(self):
+        return _connect(self.path)
+
+    @staticmethod
+    def make_key(digest, mode, version):
+        return f"{digest}:{mode}:{version}"
+
+    def get_many(self, keys):
+        """Returns {key: (processed, fingerprints)} for every cached key and refreshes their LRU stamp."""
+        found, keys = {}, list(dict.fromkeys(keys))
+        with self._connect() as conn:
+            for start in range(0, len(keys), 500): # Stay below SQLite's bound-parameter limit
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT key, processed, fingerprints FROM artifacts WHERE key IN ({placeholders})", batch)
+                for key, processed, prints in rows:
+                    found[key] = (zlib.decompress(processed).decode('utf-8', errors='surrogatepass'), _unpack_fingerprints(prints))
+            now = time.time()
+            conn.executemany("UPDATE artifacts SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        return found
+
+    def put_many(self, items):
+        """Stores (key, processed, fingerprints) tuples, then evicts down to the size limit."""
+        now, rows = time.time(), []
+        for key, processed, prints in items:
+            packed_text = zlib.compress(processed.encode('utf-8', errors='surrogatepass'))
+            packed_prints = _pack_fingerprints(prints)
+            rows.append((key, packed_text, packed_prints, len(packed_text) + len(packed_prints), now))
+        if not rows: return
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_bytes: return
+        target, doomed = self.max_bytes * _EVICT_TARGET_RATIO, []
+        for key, size in conn.execute("SELECT key, size FROM artifacts ORDER BY last_used"):
+            if total <= target: break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM artifacts WHERE key = ?", doomed)
+
+    def size_bytes(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+
+    def clear(self):
+        """Removes every cached entry and compacts the database file."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM artifacts")
+        with self._connect() as conn:
+            conn.execute("VACUUM")
+
+class PairScoreCache:
+    """Persists pair scores per scan scope (folder + mode + scorer) so rescans only
+    compare pairs involving new or modified files.
+
+    Pairs are keyed by both files' content hashes (ordered), so renaming or moving a
+    file keeps its scores. Only the MAX_SCORE_SCOPES most recently used scopes are kept.
+    Scans store their scores as they go; a checkpoint row per (folder, mode, scorer)
+    marks a scan that stopped before finishing, so the next one can offer to resume."""
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS pair_scores (
+                scope TEXT, hash1 TEXT, hash2 TEXT, score REAL, PRIMARY KEY (scope, hash1, hash2))""")
+            conn.execute("CREATE TABLE IF NOT EXISTS score_scopes (scope TEXT PRIMARY KEY, last_used REAL)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS scan_checkpoints (
+                folder TEXT, mode TEXT, scorer TEXT, scope TEXT, files INTEGER, pairs_done INTEGER,
+                pairs_total INTEGER, saved REAL, PRIMARY KEY (folder, mode, scorer))""")
+
+    def _connect(self):
+        return _connect(self.path)
+
+    @staticmethod
+    def make_scope(*parts):
+        return hashlib.sha256("\x1f".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def load(self, scope):
+        """Returns {(hash1, hash2): score} with hash1 <= hash2 for every stored pair of the scope."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT hash1, hash2, score FROM pair_scores WHERE scope = ?", (scope,))
+            return {(hash1, hash2): score for hash1, hash2, score in rows}
+
+    def store(self, scope, scores):
+        """Adds ((hash1, hash2), score) entries to the scope and drops the least recently used scopes."""
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO pair_scores VALUES (?, ?, ?, ?)",
+                             ((scope, hash1, hash2, score) for (hash1, hash2), score in scores))
+            conn.execute("INSERT OR REPLACE INTO score_scopes VALUES (?, ?)", (scope, time.time()))
+            stale = conn.execute("SELECT scope FROM score_scopes ORDER BY last_used DESC LIMIT -1 OFFSET ?", (MAX_SCORE_SCOPES,)).fetchall()
+            conn.executemany("DELETE FROM pair_scores WHERE scope = ?", stale)
+            conn.executemany("DELETE FROM score_scopes WHERE scope = ?", stale)
+            conn.executemany("DELETE FROM scan_checkpoints WHERE scope = ?", stale)
+
+    # --- Checkpoints of interrupted scans; key is (folder, mode, scorer) ---
+    def save_checkpoint(self, key, scope, files, pairs_done, pairs_total):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO scan_checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (*key, scope, files, pairs_done, pairs_total, time.time()))
+
+    def checkpoint(self, key):
+        """Returns {scope, files, pairs_done, pairs_total, saved} of the interrupted scan, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT scope, files, pairs_done, pairs_total, saved FROM scan_checkpoints "
+                               "WHERE folder = ? AND mode = ? AND scorer = ?", key).fetchone()
+        return None if row is None else dict(zip(("scope", "files", "pairs_done", "pairs_total", "saved"), row))
+
+    def clear_checkpoint(self, key):
+        """Forgets the checkpoint. Its pair scores stay: keyed by content hash, they remain valid for later scans."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scan_checkpoints WHERE folder = ? AND mode = ? AND scorer = ?", key)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pair_scores")
+            conn.execute("DELETE FROM score_scopes")
+            conn.execute("DELETE FROM scan_checkpoints")
+        with self._connect() as conn:
+            conn.execute("VACUUM")
@@ -0,0 +1,211 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+# --- Local Module Imports (no Tk / ttkbootstrap, so this runs on headless servers) ---
+from .logic import ScanEngine, ScanProgress, SCORERS, DEFAULT_MIN_MATCH, CHECKPOINT_SECONDS, build_template_index, scan_report
+from .discovery import discover_files, discover_paths, load_files
+from .cache import NormalizationCache, PairScoreCache, DEFAULT_CACHE_MAX_MB
+from .results import (DEFAULT_TOP_K, SCORE, FILE1, FILE2, GROUP, ESTIMATED, SHARED_COUNTERS, SUMMED_COUNTERS, as_stored,
+                      write_result_file, merge_result_files)
+from .utils import load_settings
+
+MODES = ("text", "python", "c", "java")
+EXIT_CLEAN, EXIT_FLAGGED, EXIT_ERROR, EXIT_CANCELLED = 0, 1, 2, 130
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+def _format_eta(seconds):
+    return "--" if seconds is None else f"{int(seconds // 60)}m {int(seconds % 60)}s"
+
+def _report_progress(progress):
+    current, total, rate = progress.snapshot()
+    if total == 0:
+        _log(f"[scan] {progress.files} files read and normalized")
+    else:
+        rate_text = f"{rate:,.0f} pairs/s" if rate else "-- pairs/s"
+        _log(f"[scan] {current / total * 100:5.1f}% ({current:,}/{total:,} pairs) | {rate_text} | ETA {_format_eta(progress.eta_seconds(current, total, rate))}")
+
+def _write_results(rows, out):
+    stream = sys.stdout if out == "-" else open(out, "w", newline="", encoding="utf-8-sig")
+    try:
+        writer = csv.writer(stream)
+        writer.writerow(["file1", "file2", "similarity", "duplicate_group", "estimated"])
+        for row in rows:
+            writer.writerow([row[FILE1], row[FILE2], f"{row[SCORE] * 100:.2f}", row[GROUP] or "", 1 if row[ESTIMATED] else ""])
+    finally:
+        if stream is not sys.stdout: stream.close()
+
+def _parse_shard(text):
+    """'K/N' (1-based, e.g. 2/4) -> (K - 1, N)."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N such as 2/4, got '{text}'")
+    if not 1 <= index <= count: raise argparse.ArgumentTypeError(f"shard {text} is out of range; K must be between 1 and N")
+    return index - 1, count
+
+def _result_meta(directory, engine, results):
+    stats = engine.stats
+    return {"directory": os.path.abspath(directory), "mode": engine.mode, "scorer": engine.scorer, "threshold": engine.threshold,
+            "file_set": stats.get("file_set"), "shard": stats.get("shard"), "complete_from": float(results.complete_from()),
+            "stats": {key: stats[key] for key in SHARED_COUNTERS + SUMMED_COUNTERS if key in stats}}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m copy_jikiller", description="COPY_JIKILLER headless plagiarism scan.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="Scan a folder and write the pairs at or above the threshold as CSV.")
+    scan.add_argument("directory", help="Folder to scan (zip/tar archives inside are read as folders).")
+    scan.add_argument("--mode", choices=MODES, default="text", help="Analysis mode (default: text).")
+    scan.add_argument("--threshold", type=float, default=70.0, help="Similarity threshold in percent (default: 70).")
+    scan.add_argument("--fail-above", type=float, default=None, metavar="PERCENT",
+                      help="Exit with code 1 if any pair reaches this similarity (default: the threshold).")
+    scan.add_argument("--workers", type=int, default=None, help="Worker processes, 0 = all cores (default: settings.json).")
+    scan.add_argument("--out", default="-", help="CSV output file, '-' for stdout (default).")
+    scan.add_argument("--ext", nargs="+", default=None, metavar="EXT", help="File extensions to include, e.g. .py .java (default: settings.json).")
+    scan.add_argument("--no-recursive", dest="recursive", action="store_false", help="Do not descend into subfolders.")
+    scan.add_argument("--scorer", choices=SCORERS, default="sequence", help="Pair scorer (default: sequence).")
+    scan.add_argument("--approximate", action="store_true", help="Use MinHash/LSH candidates for very large corpora.")
+    scan.add_argument("--template", action="append", default=[], metavar="PATH",
+                      help="Base code file, folder or archive whose content is ignored; may be repeated.")
+    scan.add_argument("--max-file-kb", type=float, default=None, metavar="KB",
+                      help="Files larger than this are only estimated from fingerprints, 0 = no cap (default: settings.json).")
+    scan.add_argument("--pair-budget", type=float, default=None, metavar="SECONDS",
+                      help="Pairs scoring longer than this are estimated from fingerprints, 0 = no limit (default: settings.json).")
+    scan.add_argument("--no-cache", dest="cache", action="store_false", help="Do not read or write the analysis cache.")
+    scan.add_argument("--stats", default=None, metavar="FILE", help="Write per-stage timings, counters and the slowest files/pairs as JSON.")
+    scan.add_argument("--profile", default=None, metavar="FILE",
+                      help="Run the scan under cProfile and save the stats (pstats format); use --workers 1 to include parsing and scoring.")
+    scan.add_argument("--stats-interval", type=float, default=5.0, metavar="SECONDS", help="Seconds between progress lines on stderr (default: 5).")
+    scan.add_argument("--results", default=None, metavar="FILE",
+                      help="Also write every kept pair as a JSON results file, which the GUI can open and merge can combine.")
+    scan.add_argument("--shard", type=_parse_shard, default=None, metavar="K/N",
+                      help="Score only the K-th of N deterministic slices of the pairs (e.g. 2/4); needs --results. "
+                           "Run all N, on any machines, then combine them with merge.")
+
+    merge = commands.add_parser("merge", help="Combine the results files of all shards of a scan into one ranked list.")
+    merge.add_argument("shards", nargs="+", metavar="FILE", help="Results files written by scan --shard K/N --results FILE.")
+    merge.add_argument("--out", default="-", help="CSV output file, '-' for stdout (default).")
+    merge.add_argument("--results", default=None, metavar="FILE", help="Write the merged results file, which the GUI can open.")
+    merge.add_argument("--threshold", type=float, default=None, help="Similarity threshold in percent for the CSV (default: the scan's).")
+    merge.add_argument("--fail-above", type=float, default=None, metavar="PERCENT",
+                       help="Exit with code 1 if any pair reaches this similarity (default: the threshold).")
+    merge.add_argument("--top-k", type=int, default=None, help="Best below-threshold pairs kept in the merged results file (default: settings.json).")
+    return parser
+
+def run_scan(args):
+    settings = load_settings()
+    extensions = args.ext or [ext for ext, enabled in settings.get("extensions", {}).items() if enabled]
+    extensions = [ext if ext.startswith(".") else "." + ext for ext in extensions]
+    if not os.path.isdir(args.directory):
+        _log(f"Error: '{args.directory}' is not a folder."); return EXIT_ERROR
+    if args.shard is not None and not args.results:
+        _log("Error: --shard needs --results FILE for merge to combine."); return EXIT_ERROR
+
+    started = time.perf_counter()
+    template = None
+    if args.template:
+        template = build_template_index((content for _, content in load_files(discover_paths(args.template, extensions), extensions)), args.mode)
+        _log(f"[scan] base code index: {len(template):,} k-grams from {len(args.template)} path(s)")
+
+    threshold = args.threshold / 100
+    fail_above = threshold if args.fail_above is None else args.fail_above / 100
+    stop_event, progress = threading.Event(), ScanProgress()
+    engine = ScanEngine(args.mode, workers=settings.get("workers", 0) if args.workers is None else args.workers,
+                        stop_event=stop_event, progress=progress, approximate=args.approximate,
+                        # The engine only keeps pairs at or above its threshold, so a lower --fail-above must lower it too
+                        threshold=min(threshold, fail_above),
+                        cache=NormalizationCache(max_mb=settings.get("cache_max_mb", DEFAULT_CACHE_MAX_MB)) if args.cache else None,
+                        score_cache=PairScoreCache() if args.cache else None, scope=os.path.abspath(args.directory),
+                        scorer=args.scorer, min_match=settings.get("gst_min_match", DEFAULT_MIN_MATCH),
+                        top_k=settings.get("top_k", DEFAULT_TOP_K), template=template, profile=bool(args.profile),
+                        max_file_size=int(1024 * (settings.get("max_file_kb", 0) if args.max_file_kb is None else args.max_file_kb)),
+                        pair_budget=settings.get("pair_time_budget", 0) if args.pair_budget is None else args.pair_budget,
+                        checkpoint_seconds=settings.get("checkpoint_seconds", CHECKPOINT_SECONDS), shard=args.shard)
+    if args.cache:
+        try:
+            saved = engine.score_cache.checkpoint(engine.checkpoint_key())
+            if saved and saved["scope"] == engine.score_scope(): _log(f"[scan] resuming an interrupted scan: {saved['pairs_done']:,} of {saved['pairs_total']:,} pairs were already done")
+        except Exception as e: _log(f"Checkpoint read error: {e}")
+    files = ((entry.name, content) for entry, content in load_files(discover_files(args.directory, extensions, args.recursive), extensions))
+
+    # The scan signals completion through an event: a join interrupted by Ctrl-C can return early on
+    # some Python versions, which would exit before a stopped scan has written its checkpoint
+    outcome, done = {}, threading.Event()
+    def scan():
+        try: outcome["results"] = engine.run(files)
+        except Exception as e: outcome["error"] = e
+        finally: done.set()
+    threading.Thread(target=scan, daemon=True).start()
+    try:
+        while not done.wait(max(0.1, args.stats_interval)):
+            _report_progress(progress)
+    except KeyboardInterrupt:
+        _log("[scan] cancelling...")
+        stop_event.set(); done.wait()
+        if args.cache: _log("[scan] progress saved; run the same command again to resume")
+        return EXIT_CANCELLED
+
+    if "error" in outcome:
+        _log(f"Error: {outcome['error']}"); return EXIT_ERROR
+    results = outcome.get("results")
+    if results is None: return EXIT_CANCELLED
+
+    ranked = results.ranked()
+    rows = [row for row in ranked if row[SCORE] >= as_stored(threshold)]
+    _write_results(rows, args.out)
+
+    elapsed, stats = time.perf_counter() - started, engine.stats
+    compared = stats.get("pairs_scored", 0)
+    _log(f"[scan] {stats.get('files', 0):,} files, {stats.get('pairs_total', 0):,} pairs: {compared:,} compared, "
+         f"{stats.get('pairs_reused', 0):,} reused, {stats.get('pairs_pruned', 0):,} pruned, "
+         f"{stats.get('duplicate_pairs', 0):,} exact duplicates, {stats.get('pairs_estimated', 0):,} estimated in {elapsed:.1f}s ({stats.get('files', 0) / max(elapsed, 1e-9):,.0f} files/s, "
+         f"{compared / max(elapsed, 1e-9):,.0f} comparisons/s)")
+    if args.shard is not None:
+        _log(f"[scan] shard {args.shard[0] + 1}/{args.shard[1]}: {stats.get('pairs_other_shards', 0):,} candidate pairs left to the other shards")
+    _log(f"[scan] {len(rows):,} pairs at or above {args.threshold:g}%")
+    if args.results:
+        write_result_file(args.results, results.ranked(include_below=True), _result_meta(args.directory, engine, results))
+        _log(f"[scan] results written to {args.results}")
+    if args.stats:
+        report = dict(scan_report(stats), elapsed_seconds=elapsed, flagged=len(rows))
+        with open(args.stats, "w", encoding="utf-8") as f: json.dump(report, f, indent=2)
+        _log(f"[scan] stats written to {args.stats}")
+    if args.profile and engine.profiler is not None:
+        engine.profiler.dump_stats(args.profile)
+        _log(f"[scan] profile written to {args.profile} (python -m pstats {args.profile})")
+
+    return EXIT_FLAGGED if ranked and ranked[0][SCORE] >= as_stored(fail_above) else EXIT_CLEAN
+
+def run_merge(args):
+    top_k = load_settings().get("top_k", DEFAULT_TOP_K) if args.top_k is None else args.top_k
+    try:
+        meta, rows = merge_result_files(args.shards, top_k)
+    except (OSError, ValueError) as e:
+        _log(f"Error: {e}"); return EXIT_ERROR
+    threshold = meta["threshold"] if args.threshold is None else args.threshold / 100
+    flagged = [row for row in rows if row[SCORE] >= as_stored(threshold)]
+    _write_results(flagged, args.out)
+    stats = meta["stats"]
+    _log(f"[merge] {meta['shards']} shards, {stats.get('files', 0):,} files, {stats.get('pairs_total', 0):,} pairs: "
+         f"{stats.get('pairs_scored', 0):,} compared, {stats.get('pairs_reused', 0):,} reused, {stats.get('pairs_estimated', 0):,} estimated")
+    _log(f"[merge] {len(flagged):,} pairs at or above {threshold * 100:g}%")
+    if threshold < meta["complete_from"]:
+        _log(f"[merge] note: the shards only kept every pair from {meta['complete_from'] * 100:.1f}% up; rescan with a lower threshold for the rest")
+    if args.results:
+        write_result_file(args.results, rows, meta)
+        _log(f"[merge] results written to {args.results}")
+    fail_above = as_stored(threshold if args.fail_above is None else args.fail_above / 100)
+    return EXIT_FLAGGED if rows and rows[0][SCORE] >= fail_above else EXIT_CLEAN
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "scan": return run_scan(args)
+    if args.command == "merge": return run_merge(args)
+    return EXIT_ERROR
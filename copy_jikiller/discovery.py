@@ -0,0 +1,139 @@
+import io
+import os
+import tarfile
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_IO_WORKERS = 8 # Directory listings and file reads are I/O bound, so more threads than cores pay off on network shares
+
+# --- Archives (read as virtual directories, never extracted to disk) ---
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ARCHIVE_SEPARATOR = "!" # Member names are shown as "archive.zip!dir/member.py"
+MAX_ARCHIVE_DEPTH = 4 # Archives nested deeper than this are skipped
+
+FileEntry = namedtuple("FileEntry", ["name", "path", "size", "mtime"])
+
+def _matches(filename, extensions):
+    return not filename.startswith('.') and any(filename.endswith(ext) for ext in extensions)
+
+def is_archive(filename):
+    return not filename.startswith('.') and filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+def _member_contents(source, archive_name, extensions, depth=0):
+    """Yields (virtual name, bytes) for every matching member of a zip/tar archive given as a path or
+    file object. Tar archives are read as one sequential stream; nested archives are opened in memory."""
+    if archive_name.lower().endswith(".zip"):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield from _member(archive_name, info.filename, lambda: archive.read(info), extensions, depth)
+    else:
+        stream = {"name": source} if isinstance(source, str) else {"fileobj": source}
+        with tarfile.open(mode="r|*", **stream) as archive:
+            for info in archive:
+                if info.isfile():
+                    yield from _member(archive_name, info.name, lambda: archive.extractfile(info).read(), extensions, depth)
+
+def _member(archive_name, member_name, read, extensions, depth):
+    basename, name = member_name.rsplit("/", 1)[-1], f"{archive_name}{ARCHIVE_SEPARATOR}{member_name}"
+    if is_archive(basename):
+        if depth < MAX_ARCHIVE_DEPTH:
+            try:
+                yield from _member_contents(io.BytesIO(read()), name, extensions, depth + 1)
+            except (zipfile.BadZipFile, tarfile.TarError, OSError, EOFError) as e: print(f"Archive read error '{name}': {e}")
+    elif _matches(basename, extensions):
+        yield name, read()
+
+def read_archive(entry, extensions):
+    """Returns [(FileEntry, content)] for the matching members of an archive found by discover_files."""
+    try:
+        return [(FileEntry(name, entry.path, len(data), entry.mtime), data.decode('utf-8', errors='ignore'))
+                for name, data in _member_contents(entry.path, entry.name, extensions)]
+    except (zipfile.BadZipFile, tarfile.TarError, OSError, EOFError) as e:
+        print(f"Archive read error '{entry.path}': {e}")
+        return []
+
+def _list_directory(path, prefix, extensions, archives):
+    """Lists one directory with scandir: returns (matching FileEntry list, [(subdirectory path, relative prefix)])."""
+    files, subdirectories = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append((entry.path, prefix + entry.name + os.sep))
+                    elif entry.is_file() and (_matches(entry.name, extensions) or archives and is_archive(entry.name)):
+                        stat = entry.stat()
+                        files.append(FileEntry(prefix + entry.name, entry.path, stat.st_size, stat.st_mtime))
+                except OSError as e: print(f"File stat error '{entry.path}': {e}")
+    except OSError as e: print(f"Directory read error '{path}': {e}")
+    return files, subdirectories
+
+def discover_files(directory, extensions, recursive, workers=DEFAULT_IO_WORKERS, archives=True):
+    """Yields a FileEntry (name relative to directory, path, size, mtime) per matching file and,
+    with archives, per zip/tar archive (is_archive) whose members load_files expands.
+    Only paths and stat results are collected; subdirectories are listed in parallel and
+    entries are yielded as soon as their directory has been read, in no particular order."""
+    if not extensions: return
+    if not recursive:
+        yield from _list_directory(directory, "", extensions, archives)[0]
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {executor.submit(_list_directory, directory, "", extensions, archives)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirectories = future.result()
+                running.update(executor.submit(_list_directory, path, prefix, extensions, archives) for path, prefix in subdirectories)
+                yield from files
+
+def discover_paths(paths, extensions, workers=DEFAULT_IO_WORKERS):
+    """Yields a FileEntry per file of a mixed list of files, archives and folders (searched
+    recursively), e.g. template sources. Explicitly listed files are taken regardless of extension."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from discover_files(path, extensions, True, workers)
+        elif os.path.isfile(path):
+            stat = os.stat(path)
+            yield FileEntry(os.path.basename(path), path, stat.st_size, stat.st_mtime)
+        else: print(f"Path not found: '{path}'")
+
+def count_files(directory, extensions, recursive, workers=DEFAULT_IO_WORKERS):
+    """Returns (plain files, archives) without opening anything."""
+    files = archives = 0
+    for entry in discover_files(directory, extensions, recursive, workers):
+        if is_archive(entry.name): archives += 1
+        else: files += 1
+    return files, archives
+
+def read_file(entry):
+    try:
+        with open(entry.path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    except Exception as e:
+        print(f"File read error '{entry.path}': {e}")
+        return None
+
+def _read_entry(entry, extensions):
+    if is_archive(entry.name): return read_archive(entry, extensions)
+    content = read_file(entry)
+    return [] if content is None else [(entry, content)]
+
+def _readable(done):
+    return [loaded for future in done for loaded in future.result()]
+
+def load_files(entries, extensions, workers=DEFAULT_IO_WORKERS):
+    """Reads the given FileEntry stream on a thread pool and yields (entry, content) as reads finish;
+    archives are expanded into one entry per matching member. At most a few reads per thread are
+    in flight, so a slow consumer also throttles discovery. Unreadable files are skipped."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = set()
+        for entry in entries:
+            running.add(executor.submit(_read_entry, entry, extensions))
+            if len(running) >= workers * 4:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                yield from _readable(done)
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            yield from _readable(done)
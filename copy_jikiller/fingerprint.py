@@ -0,0 +1,183 @@
+import zlib
+import hashlib
+import itertools
+import importlib.util
+from array import array
+from collections import deque, Counter
+
+# NumPy is only imported by the MinHash/LSH mode that needs it
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# --- Fingerprinting Parameters ---
+# Every match of at least (k + window - 1) tokens is guaranteed to share a fingerprint.
+K, WINDOW = 8, 4                # k-grams over normalized tokens, winnowing window
+# Python (VAR/FUNC/ARG) and plain text streams repeat short runs across unrelated files, so
+# their k-grams must be longer before the index can tell files apart
+MODE_K = {"python": 16, "text": 16}
+MINHASH_PERMUTATIONS = 128      # Signature length for the approximate (MinHash/LSH) mode
+LSH_TARGET_RECALL = 0.95        # Band/row split must find pairs at the threshold with this probability
+TEMPLATE_K = 12                 # Template regions must match this many normalized tokens in a row to be stripped
+ESTIMATE_K = 8                  # k-gram length of the estimate; shorter runs recur by chance in few-token streams
+
+_HASH_BASE = 1000003
+_HASH_MASK = (1 << 64) - 1
+_MINHASH_PRIME = (1 << 31) - 1
+
+def kgram_hashes(tokens, k):
+    """Rolling Karp-Rabin hashes of every k-gram of the token stream.
+    Token hashes use crc32 so fingerprints are stable across processes and runs; token-ID
+    arrays (TokenVocabulary) hash their IDs directly, which is only stable within one scan."""
+    if len(tokens) < k:
+        return []
+    token_hashes = list(tokens) if isinstance(tokens, array) else [zlib.crc32(token.encode('utf-8')) for token in tokens]
+    power = pow(_HASH_BASE, k - 1, _HASH_MASK + 1)
+    h = 0
+    for value in token_hashes[:k]:
+        h = (h * _HASH_BASE + value) & _HASH_MASK
+    hashes = [h]
+    for i in range(k, len(token_hashes)):
+        h = ((h - token_hashes[i - k] * power) * _HASH_BASE + token_hashes[i]) & _HASH_MASK
+        hashes.append(h)
+    return hashes
+
+def winnow(hashes, window):
+    """Selects the rightmost minimal hash of every window (robust winnowing, Schleimer et al.)."""
+    if not hashes:
+        return set()
+    if len(hashes) <= window:
+        return {min(hashes)}
+    selected, candidates = set(), deque()  # indices of increasing hash values
+    for i, h in enumerate(hashes):
+        while candidates and hashes[candidates[-1]] >= h:
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1:
+            selected.add(hashes[candidates[0]])
+    return selected
+
+def kgram_length(mode):
+    """Winnowing k-gram length for the given analysis mode."""
+    return MODE_K.get(mode, K)
+
+def fingerprint(tokens, k=K, window=WINDOW):
+    """Computes the winnowed fingerprint set of a normalized token list."""
+    return winnow(kgram_hashes(tokens, k), window)
+
+def kgram_counts(tokens, k=ESTIMATE_K):
+    """Multiset (Counter) of the token stream's k-gram hashes."""
+    return Counter(kgram_hashes(tokens, k))
+
+def estimate_similarity(kgrams1, kgrams2):
+    """Multiset Dice coefficient of two kgram_counts: a linear-time stand-in for the token scorers'
+    2 * matched / (len1 + len2), used for pairs that are too big or too slow to score. Counting
+    repeats keeps a k-gram that occurs 500 times in one file and once in the other from matching
+    500 times, which a plain set would (and saturate towards 1.0 on long, repetitive files)."""
+    total = sum(kgrams1.values()) + sum(kgrams2.values())
+    if not total: return 0.0
+    return 2.0 * sum((kgrams1 & kgrams2).values()) / total
+
+def candidate_pairs(fingerprints):
+    """Builds an inverted index (fingerprint -> files) and returns the sorted (i, j) pairs
+    that share at least one fingerprint. Files too short to fingerprint are paired with all."""
+    count = len(fingerprints)
+    index = {}
+    for file_index, prints in enumerate(fingerprints):
+        for value in prints:
+            index.setdefault(value, []).append(file_index)
+
+    # Boilerplate fingerprints tend to share identical posting lists; expand each list only once
+    postings_lists = {tuple(postings) for postings in index.values() if len(postings) > 1}
+    pair_keys = set()
+    for postings in postings_lists:
+        pair_keys.update(i * count + j for i, j in itertools.combinations(postings, 2))
+    for i, prints in enumerate(fingerprints):
+        if not prints:
+            pair_keys.update(min(i, j) * count + max(i, j) for j in range(count) if j != i)
+    return [divmod(key, count) for key in sorted(pair_keys)]
+
+# --- Template (Base Code) Exclusion ---
+class TemplateIndex:
+    """Exclusion index holding every k-gram hash of the template (skeleton) files.
+
+    strip() drops each token of a file that lies inside a k-gram also found in a template,
+    so handed-out code no longer counts towards any pair's score. It runs once per file."""
+    def __init__(self, k=TEMPLATE_K):
+        self.k, self.hashes = k, set()
+
+    def add(self, tokens):
+        self.hashes.update(kgram_hashes(tokens, self.k))
+
+    def digest(self):
+        """Stable identity of the indexed templates, for cache scopes."""
+        return hashlib.sha256(b"".join(h.to_bytes(8, "little") for h in sorted(self.hashes))).hexdigest()
+
+    def strip(self, tokens):
+        """Returns (tokens outside template regions, number of tokens removed)."""
+        covered, marked = bytearray(len(tokens)), b"\x01" * self.k
+        for start, h in enumerate(kgram_hashes(tokens, self.k)):
+            if h in self.hashes: covered[start:start + self.k] = marked
+        removed = covered.count(1)
+        if not removed: return tokens, 0
+        return [token for token, flag in zip(tokens, covered) if not flag], removed
+
+    def __len__(self):
+        return len(self.hashes)
+
+# --- Approximate Mode (MinHash + LSH banding) ---
+def lsh_recall(jaccard, bands, rows):
+    """Probability that a pair with the given Jaccard similarity shares at least one band."""
+    return 1.0 - (1.0 - jaccard ** rows) ** bands
+
+def lsh_parameters(threshold, num_perm=MINHASH_PERMUTATIONS, target_recall=LSH_TARGET_RECALL):
+    """Derives (bands, rows, expected_recall) from a similarity threshold in [0, 1].
+
+    The scorers report a Dice-style ratio 2M/(a+b); the equivalent Jaccard J = D/(2-D) is
+    used as the LSH operating point. The split with the most rows per band (fewest false
+    candidates) that still reaches target_recall at that point is chosen."""
+    jaccard = threshold / (2.0 - threshold) if 0 < threshold < 1 else min(max(threshold, 0.0), 1.0)
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        recall = lsh_recall(jaccard, bands, rows)
+        if recall >= target_recall:
+            return bands, rows, recall
+    return num_perm, 1, lsh_recall(jaccard, num_perm, 1)
+
+def minhash_signatures(fingerprints, num_perm=MINHASH_PERMUTATIONS, seed=1):
+    """Builds a (files x num_perm) MinHash signature matrix from fingerprint sets using
+    universal hashing (a*x + b) mod p, vectorized per file. Requires NumPy."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, _MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+    signatures = np.full((len(fingerprints), num_perm), _MINHASH_PRIME, dtype=np.uint64)
+    for file_index, prints in enumerate(fingerprints):
+        if not prints: continue
+        values = np.fromiter(prints, dtype=np.uint64, count=len(prints)) % _MINHASH_PRIME
+        signatures[file_index] = ((np.outer(a, values) + b[:, None]) % _MINHASH_PRIME).min(axis=1)
+    return signatures
+
+def lsh_candidate_pairs(fingerprints, threshold, num_perm=MINHASH_PERMUTATIONS):
+    """Returns (sorted (i, j) candidate pairs, expected recall) using LSH banding over MinHash
+    signatures. Files too short to fingerprint are paired with all."""
+    count = len(fingerprints)
+    bands, rows, recall = lsh_parameters(threshold, num_perm)
+    signatures = minhash_signatures(fingerprints, num_perm)
+    indexed = [i for i, prints in enumerate(fingerprints) if prints]
+
+    bucket_lists = set()
+    for band in range(bands):
+        band_rows = signatures[:, band * rows:(band + 1) * rows]
+        buckets = {}
+        for i in indexed:
+            buckets.setdefault(band_rows[i].tobytes(), []).append(i)
+        bucket_lists.update(tuple(members) for members in buckets.values() if len(members) > 1)
+
+    pair_keys = set()
+    for members in bucket_lists:
+        pair_keys.update(i * count + j for i, j in itertools.combinations(members, 2))
+    for i, prints in enumerate(fingerprints):
+        if not prints:
+            pair_keys.update(min(i, j) * count + max(i, j) for j in range(count) if j != i)
+    return [divmod(key, count) for key in sorted(pair_keys)], recall
@@ -10,6 +10,10 @@ LANGUAGES = {
             "c": "C/C++ (AST)", 
             "java": "Java (AST)"
         },
+        "scorer_display_names": {
+            "sequence": "Scorer: Sequence Matcher",
+            "gst": "Scorer: Greedy String Tiling"
+        },
         
         # --- Main UI Text ---
         "theme_label": "Theme:",
@@ -18,24 +22,47 @@ LANGUAGES = {
         "select_button": "Select Folder",
         "folder_label": "Please select a folder to start.",
         "folder_prefix": "Selected",
+        "template_menu": "📄 Base Code ({count})",
+        "template_add_files": "Add Base Code Files...",
+        "template_add_folder": "Add Base Code Folder...",
+        "template_clear": "Clear Base Code",
         "analysis_title": "⚙️ Analysis Settings",
         "recursive_check": "Include Subfolders",
+        "approximate_check": "Approximate Mode (Large Corpora)",
+        "clear_cache_button": "🗑️ Clear Cache",
         "filter_title": "🔍 Filtering",
         "extensions_menu": "Select Extensions",
         "threshold_prefix_label": "Similarity ≥",
         "scan_button": "✔️ Start Scan",
         "stop_button": "❌ Stop",
         "export_button": "💾 Export Results",
+        "details_button": "📊 Scan Details",
+        "load_results_button": "📂 Open Results",
+        "results_filter_label": "Filter by file:",
+        "results_score_label": "Similarity (%):",
+        "results_count": "Showing {shown:,} of {total:,} pairs",
         
         # --- Statusbar Text ---
         "status_ready": "Ready.",
         "status_folder_selected": "Ready to scan. Press the 'Start Scan' button.",
         "status_file_count": "Found {count} files. Ready to scan.",
         "status_error_reading": "Error reading files: {error}",
+        "status_loading_files": "Reading and normalizing files... {count} so far",
+        "status_archive_count": " {count} archives (zip/tar) will be read as folders.",
         "status_scanning": "Progress: {percent:.1f}% ({current}/{total}) | ETA: {eta}",
         "status_scan_done": "Scan complete.",
+        "status_scan_summary": "Scan complete. {scored} pairs compared, {reused} reused from earlier scans, {pruned} skipped by the fingerprint index.",
+        "status_lsh_recall": " Expected recall: {recall:.1f}%",
+        "status_resumed": " Resumed an interrupted scan.",
+        "status_results_loaded": "Opened {count:,} pairs from '{file}'.",
+        "status_saving_checkpoint": "Saving scan progress...",
+        "status_estimated": " {count} pairs over the time budget or file size cap were estimated from fingerprints (marked ≈).",
+        "status_template": " Base code removed from {files} files ({tokens} tokens).",
+        "status_duplicates": " {files} files are exact duplicates after normalization ({groups} groups), compared once per group.",
+        "status_prefilter": " Below-threshold bounds skipped {length} (length) + {histogram} (token histogram) pairs.",
         "status_scan_cancelled": "Scan cancelled by user.",
         "status_no_files": "No files to compare.",
+        "status_rescan_hint": "Pairs below {floor:.1f}% were not all kept by the last scan. Rescan at this threshold to see every pair.",
         
         # --- Dialog & Messagebox Text ---
         "dialog_select_folder": "Select Folder to Scan",
@@ -50,6 +77,11 @@ LANGUAGES = {
         "dialog_scan_error": "An error occurred during the scan: {error}",
         "dialog_export_success": "Results successfully exported to '{file}'.",
         "dialog_export_error": "An error occurred while exporting: {error}",
+        "dialog_load_results": "Open Results",
+        "dialog_results_error": "Could not open the results file: {error}",
+        "dialog_results_shard": "This file holds only shard {shard} of a scan. Combine all shards with 'python -m copy_jikiller merge' and open the merged file.",
+        "dialog_cache_cleared": "The analysis cache has been cleared.",
+        "dialog_cache_error": "An error occurred while clearing the cache: {error}",
         "dialog_add_ext_title": "Add Extension",
         "dialog_add_ext_label": "Enter new extension (e.g., .txt):",
         "dialog_manage_ext_title": "Manage Extensions",
@@ -58,6 +90,18 @@ LANGUAGES = {
         "dialog_invalid_input_title": "Invalid Input",
         "dialog_invalid_ext_msg": "Invalid format. The extension must start with a dot (e.g., .txt).",
         "dialog_no_custom_ext": "No custom extensions to delete.",
+        "dialog_resume_title": "Resume Scan",
+        "dialog_resume_msg": "A scan of this folder was interrupted on {saved} after {done:,} of {total:,} pairs. Resume it, or start over?",
+        "dialog_resume": "Resume",
+        "dialog_start_over": "Start Over",
+        "stats_title": "📊 Scan Details",
+        "stats_stages": "Stage timings (seconds)",
+        "stats_counters": "Counters",
+        "stats_slowest_files": "Slowest files to normalize",
+        "stats_slowest_pairs": "Slowest pairs to score",
+        "stats_save_json": "Save as JSON...",
+        "stats_save_profile": "Save Profile...",
+        "stats_profile_hint": "Set \"profile_scans\": true in settings.json to record a cProfile profile of the next scan.",
         "all_files": "All Files (*.*)",
         
         # --- Info Window Text ---
@@ -72,12 +116,15 @@ LANGUAGES = {
         # --- Treeview Headers ---
         "tree_file1": "File 1",
         "tree_file2": "File 2",
-        "tree_similarity": "Similarity (%)"
+        "tree_similarity": "Similarity (%)",
+        "tree_group": "Duplicate Group",
+        "duplicate_group": "🔁 #{group}"
     },
     "KR": {
         # --- 표시 이름 ---
         "theme_display_names": {"superhero": "다크", "litera": "라이트"},
         "analysis_mode_display_names": {"text": "기본 분석 (텍스트)", "python": "Python (AST)", "c": "C/C++ (AST)", "java": "Java (AST)"},
+        "scorer_display_names": {"sequence": "비교 방식: 시퀀스 매칭", "gst": "비교 방식: Greedy String Tiling"},
         
         # --- 메인 UI 텍스트 ---
         "theme_label": "테마:",
@@ -86,24 +133,47 @@ LANGUAGES = {
         "select_button": "폴더 선택",
         "folder_label": "검사를 시작할 폴더를 선택해주세요.",
         "folder_prefix": "선택",
+        "template_menu": "📄 기본 제공 코드 ({count})",
+        "template_add_files": "기본 제공 코드 파일 추가...",
+        "template_add_folder": "기본 제공 코드 폴더 추가...",
+        "template_clear": "기본 제공 코드 지우기",
         "analysis_title": "⚙️ 분석 설정",
         "recursive_check": "하위 폴더 포함",
+        "approximate_check": "근사 모드 (대용량)",
+        "clear_cache_button": "🗑️ 캐시 비우기",
         "filter_title": "🔍 필터링",
         "extensions_menu": "확장자 선택",
         "threshold_prefix_label": "유사도 ≥",
         "scan_button": "✔️ 검사 시작",
         "stop_button": "❌ 중단",
         "export_button": "💾 결과 내보내기",
+        "details_button": "📊 검사 세부 정보",
+        "load_results_button": "📂 결과 열기",
+        "results_filter_label": "파일 이름 필터:",
+        "results_score_label": "유사도 (%):",
+        "results_count": "{total:,}쌍 중 {shown:,}쌍 표시",
         
         # --- 상태바 텍스트 ---
         "status_ready": "준비되었습니다.",
         "status_folder_selected": "검사 준비 완료. '검사 시작' 버튼을 누르세요.",
         "status_file_count": "총 {count}개의 파일을 찾았습니다. 검사 준비 완료.",
         "status_error_reading": "파일을 읽는 중 오류가 발생했습니다: {error}",
+        "status_loading_files": "파일을 읽고 정규화하는 중... 현재 {count}개",
+        "status_archive_count": " 압축 파일(zip/tar) {count}개는 폴더처럼 읽습니다.",
         "status_scanning": "진행률: {percent:.1f}% ({current}/{total}) | 남은 시간: {eta}",
         "status_scan_done": "검사 완료됨.",
+        "status_scan_summary": "검사 완료됨. {scored}개 쌍 비교, 이전 결과 {reused}개 재사용, 지문 색인으로 {pruned}개 쌍 제외.",
+        "status_lsh_recall": " 예상 재현율: {recall:.1f}%",
+        "status_resumed": " 중단된 검사를 이어서 완료했습니다.",
+        "status_results_loaded": "'{file}'에서 {count:,}개 쌍을 불러왔습니다.",
+        "status_saving_checkpoint": "검사 진행 상황을 저장하는 중...",
+        "status_estimated": " 시간 예산 또는 파일 크기 제한을 넘은 {count}개 쌍은 지문으로 추정했습니다 (≈ 표시).",
+        "status_template": " 기본 제공 코드를 {files}개 파일에서 제거했습니다({tokens}개 토큰).",
+        "status_duplicates": " 정규화 후 완전히 같은 파일 {files}개({groups}개 그룹)는 그룹마다 한 번만 비교했습니다.",
+        "status_prefilter": " 상한 필터로 {length}개(길이) + {histogram}개(토큰 분포) 쌍 제외.",
         "status_scan_cancelled": "사용자에 의해 중단됨",
         "status_no_files": "비교할 파일 없음.",
+        "status_rescan_hint": "지난 검사에서 {floor:.1f}% 미만의 쌍은 일부만 보관되었습니다. 모든 쌍을 보려면 이 기준으로 다시 검사하세요.",
         
         # --- 다이얼로그 및 메시지 박스 텍스트 ---
         "dialog_select_folder": "검사할 폴더를 선택하세요",
@@ -118,6 +188,11 @@ LANGUAGES = {
         "dialog_scan_error": "검사 중 오류가 발생했습니다: {error}",
         "dialog_export_success": "결과를 '{file}' 파일로 성공적으로 내보냈습니다.",
         "dialog_export_error": "결과를 내보내는 중 오류가 발생했습니다: {error}",
+        "dialog_load_results": "결과 열기",
+        "dialog_results_error": "결과 파일을 열 수 없습니다: {error}",
+        "dialog_results_shard": "이 파일에는 검사의 샤드 {shard}만 들어 있습니다. 'python -m copy_jikiller merge'로 모든 샤드를 합친 뒤 합쳐진 파일을 여세요.",
+        "dialog_cache_cleared": "분석 캐시를 비웠습니다.",
+        "dialog_cache_error": "캐시를 비우는 중 오류가 발생했습니다: {error}",
         "dialog_add_ext_title": "확장자 추가",
         "dialog_add_ext_label": "새 확장자를 입력하세요 (예: .txt):",
         "dialog_manage_ext_title": "확장자 관리",
@@ -126,6 +201,18 @@ LANGUAGES = {
         "dialog_invalid_input_title": "잘못된 입력",
         "dialog_invalid_ext_msg": "확장자는 점(.)으로 시작해야 합니다 (예: .txt)",
         "dialog_no_custom_ext": "삭제할 사용자 추가 확장자가 없습니다.",
+        "dialog_resume_title": "검사 이어하기",
+        "dialog_resume_msg": "이 폴더의 검사가 {saved}에 {total:,}개 쌍 중 {done:,}개를 마치고 중단되었습니다. 이어서 검사할까요, 처음부터 다시 시작할까요?",
+        "dialog_resume": "이어하기",
+        "dialog_start_over": "처음부터",
+        "stats_title": "📊 검사 세부 정보",
+        "stats_stages": "단계별 소요 시간 (초)",
+        "stats_counters": "카운터",
+        "stats_slowest_files": "정규화가 가장 오래 걸린 파일",
+        "stats_slowest_pairs": "비교가 가장 오래 걸린 쌍",
+        "stats_save_json": "JSON으로 저장...",
+        "stats_save_profile": "프로파일 저장...",
+        "stats_profile_hint": "settings.json에서 \"profile_scans\": true로 설정하면 다음 검사의 cProfile 프로파일이 기록됩니다.",
         "all_files": "모든 파일 (*.*)",
         
         # --- 정보 창 텍스트 ---
@@ -140,6 +227,8 @@ LANGUAGES = {
         # --- 결과 목록 헤더 ---
         "tree_file1": "파일 1",
         "tree_file2": "파일 2",
-        "tree_similarity": "유사도 (%)"
+        "tree_similarity": "유사도 (%)",
+        "tree_group": "중복 그룹",
+        "duplicate_group": "🔁 #{group}"
     }
 }
\ No newline at end of file
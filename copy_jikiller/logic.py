@@ -1,129 +1,1107 @@
 import re
 import ast
 import difflib
+import itertools
+import os
 import sys
+import math
+import time
+import io
+import signal
+import heapq
+import pstats
+import cProfile
+import threading
+import multiprocessing
+import importlib.util
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
-# --- Check availability of parser libraries ---
-try:
-    import clang.cindex
-    # Import and run configuration logic from utils
-    # This needs to be relative for the package structure to work
+from . import fingerprint
+from .cache import content_hash
+from .results import ResultStore, PairArrays, DEFAULT_TOP_K
+
+# --- Parser libraries (imported on first use of their analysis mode) ---
+_backends, _backend_lock = {}, threading.Lock()
+
+def _load_clang():
+    try:
+        import clang.cindex
+    except ImportError:
+        return None
+    # Locating libclang probes the filesystem, so it also waits for the first C/C++ scan
     from .utils import configure_clang
-    CLANG_AVAILABLE = configure_clang(clang)
-except ImportError:
-    CLANG_AVAILABLE = False
+    return clang if configure_clang(clang) else None
+
+def _load_javalang():
+    try:
+        import javalang
+        return javalang
+    except ImportError:
+        return None
+
+_BACKEND_LOADERS = {"c": _load_clang, "java": _load_javalang}
+
+def backend(mode):
+    """Returns the parser module of an analysis mode (None if unavailable), importing it once per process."""
+    if mode not in _backends:
+        with _backend_lock:
+            if mode not in _backends: _backends[mode] = _BACKEND_LOADERS[mode]()
+    return _backends[mode]
+
+def backend_available(mode):
+    """True if the mode's parser library can be loaded; imports it on the first call."""
+    return mode not in _BACKEND_LOADERS or backend(mode) is not None
+
+def backend_installed(mode):
+    """Cheap check for display purposes: is the mode's parser package installed at all (nothing is imported)."""
+    package = {"c": "clang", "java": "javalang"}.get(mode)
+    return package is None or importlib.util.find_spec(package) is not None
 
-try:
-    import javalang
-    JAVALANG_AVAILABLE = True
-except ImportError:
-    JAVALANG_AVAILABLE = False
+def __getattr__(name):
+    # CLANG_AVAILABLE / JAVALANG_AVAILABLE stay importable; reading one loads that back end
+    flags = {"CLANG_AVAILABLE": "c", "JAVALANG_AVAILABLE": "java"}
+    if name in flags: return backend_available(flags[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# NumPy is only imported by the vectorized pre-filter that needs it
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# Bump whenever a normalizer's output changes so stale on-disk cache entries are ignored
+NORMALIZER_VERSION = 3
+
+# Words, numbers and single punctuation characters of normalized or plain text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Joins token lists into one string for IPC and the on-disk cache (never part of a token)
+TOKEN_SEPARATOR = "\x1f"
+# Identifiers collapse to their category (as in JPlag) instead of per-file numbers like ID_0, ID_1:
+# numbering by first appearance lets one extra name near the top shift, and mismatch, every later one
+IDENTIFIER_TOKEN = "ID"
 
 # --- Analyzer Logic ---
-def normalize_c_cpp_code(code_text):
-    """Normalizes C/C++ code by generalizing identifiers using Clang."""
-    if not CLANG_AVAILABLE: return code_text
+# One libclang Index per process (GUI thread or pool worker), reused for every file
+_clang_index = None
+_CLANG_SOURCE_NAME = 'tmp.cpp'
+# Lexing only needs the main file: skip header search and function bodies
+_CLANG_TOKENIZE_ARGS = ['-std=c++11', '-nostdinc', '-nostdinc++']
+
+def _get_clang_index():
+    global _clang_index
+    if _clang_index is None:
+        _clang_index = backend("c").cindex.Index.create()
+    return _clang_index
+
+def tokenize_c_cpp(code_text, timings=None):
+    """Returns C/C++ tokens with every identifier replaced by ID using Clang, or None if Clang is unavailable or fails.
+
+    The translation unit is only set up far enough to lex the main file. If a timings dict is given,
+    the seconds spent creating it ('parse') and walking its tokens ('tokens') are stored in it."""
+    clang = backend("c")
+    if clang is None: return None
     try:
-        index = clang.cindex.Index.create()
+        started = time.perf_counter()
+        index = _get_clang_index()
         # Parse the code in memory
-        tu = index.parse('tmp.cpp', args=['-std=c++11'], 
-                         unsaved_files=[('tmp.cpp', code_text)], 
-                         options=clang.cindex.TranslationUnit.PARSE_DETAILED_PROCESSING_RECORD)
+        tu = index.parse(_CLANG_SOURCE_NAME, args=_CLANG_TOKENIZE_ARGS,
+                         unsaved_files=[(_CLANG_SOURCE_NAME, code_text)],
+                         options=clang.cindex.TranslationUnit.PARSE_INCOMPLETE | clang.cindex.TranslationUnit.PARSE_SKIP_FUNCTION_BODIES)
+        parsed = time.perf_counter()
         
-        normalized_tokens, name_map, counter = [], {}, 0
+        normalized_tokens = []
         for token in tu.get_tokens(extent=tu.cursor.extent):
             # Process only identifiers, ignore comments
             if token.kind == clang.cindex.TokenKind.IDENTIFIER:
-                if token.spelling not in name_map:
-                    name_map[token.spelling] = f"ID_{counter}"
-                    counter += 1
-                normalized_tokens.append(name_map[token.spelling])
+                normalized_tokens.append(IDENTIFIER_TOKEN)
             elif token.kind != clang.cindex.TokenKind.COMMENT:
                 normalized_tokens.append(token.spelling)
-        return " ".join(normalized_tokens)
+        if timings is not None:
+            timings.update(parse=parsed - started, tokens=time.perf_counter() - parsed)
+        return normalized_tokens
     except Exception as e:
         print(f"C/C++ parsing error: {e}")
-        return code_text
+        return None
 
-def normalize_java_code(code_text):
-    """Normalizes Java code by generalizing identifiers using javalang."""
-    if not JAVALANG_AVAILABLE: return code_text
+def normalize_c_cpp_code(code_text):
+    """Normalizes C/C++ code by generalizing identifiers using Clang."""
+    tokens = tokenize_c_cpp(code_text)
+    return code_text if tokens is None else " ".join(tokens)
+
+def tokenize_java(code_text):
+    """Returns Java tokens with every identifier replaced by ID using javalang, or None if javalang is unavailable or fails."""
+    javalang = backend("java")
+    if javalang is None: return None
     try:
         tokens = list(javalang.tokenizer.tokenize(code_text))
-        normalized_tokens, name_map, counter = [], {}, 0
+        normalized_tokens = []
         for token in tokens:
             if isinstance(token, javalang.tokenizer.Identifier):
-                if token.value not in name_map:
-                    name_map[token.value] = f"ID_{counter}"
-                    counter += 1
-                normalized_tokens.append(name_map[token.value])
+                normalized_tokens.append(IDENTIFIER_TOKEN)
             # Exclude comments and separators from the token stream
             elif not isinstance(token, (javalang.tokenizer.Comment, javalang.tokenizer.Separator)):
                 normalized_tokens.append(token.value)
-        return " ".join(normalized_tokens)
+        return normalized_tokens
     except Exception as e:
         print(f"Java parsing error: {e}")
-        return code_text
+        return None
+
+def normalize_java_code(code_text):
+    """Normalizes Java code by generalizing identifiers using javalang."""
+    tokens = tokenize_java(code_text)
+    return code_text if tokens is None else " ".join(tokens)
 
 class AstNormalizer(ast.NodeTransformer):
-    """A NodeTransformer to normalize identifiers in a Python AST."""
-    def __init__(self):
-        self.name_map, self.counter = {}, 0
-    def _get_normalized_name(self, name, prefix):
-        if name not in self.name_map:
-            self.name_map[name] = f"{prefix}_{self.counter}"
-            self.counter += 1
-        return self.name_map[name]
+    """A NodeTransformer that replaces Python identifiers by their category (VAR, FUNC, ARG)."""
     def visit_Name(self, node):
         if isinstance(node.ctx, (ast.Load, ast.Store)):
-            node.id = self._get_normalized_name(node.id, "VAR")
+            node.id = "VAR"
         return node
     def visit_FunctionDef(self, node):
-        node.name = self._get_normalized_name(node.name, "FUNC")
+        node.name = "FUNC"
         self.generic_visit(node)
         return node
     def visit_arg(self, node):
-        node.arg = self._get_normalized_name(node.arg, "ARG")
+        node.arg = "ARG"
         return node
 
-def normalize_python_code(code_text):
-    """Normalizes Python code using the built-in AST module."""
+def _unparse_normalized_python(code_text):
+    """Returns the identifier-normalized source of a Python AST, or None if parsing fails."""
     try:
         tree = ast.parse(code_text)
         normalizer = AstNormalizer()
         normalized_tree = normalizer.visit(tree)
         return ast.unparse(normalized_tree)
     except (SyntaxError, ValueError):
-        # Fallback to text preprocessing if AST parsing fails
-        return text_preprocess(code_text)
+        return None
 
-def text_preprocess(content):
-    """Basic text preprocessing: remove comments and all whitespace."""
+def tokenize_python(code_text):
+    """Returns Python tokens from the identifier-normalized AST, or None if parsing fails."""
+    normalized = _unparse_normalized_python(code_text)
+    return None if normalized is None else split_tokens(normalized)
+
+def normalize_python_code(code_text):
+    """Normalizes Python code using the built-in AST module."""
+    normalized = _unparse_normalized_python(code_text)
+    # Fallback to text preprocessing if AST parsing fails
+    return text_preprocess(code_text) if normalized is None else normalized
+
+def _strip_comments(content):
     content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL) # C-style block comments
     content = re.sub(r'//.*', '', content) # C++-style line comments
     content = re.sub(r'#.*', '', content) # Python-style line comments
-    return "".join(content.split())
+    return content
+
+def text_preprocess(content):
+    """Basic text preprocessing: remove comments and all whitespace."""
+    return "".join(_strip_comments(content).split())
+
+def split_tokens(text):
+    """Splits text into word/number tokens and single punctuation tokens."""
+    return _TOKEN_PATTERN.findall(text)
+
+def text_tokens(content):
+    """Basic text tokenization: comments removed, whitespace only separates tokens."""
+    return split_tokens(_strip_comments(content))
 
 def calculate_similarity_fast(text1, text2):
-    """Calculates similarity between two texts using difflib for speed."""
+    """Calculates similarity between two texts or token sequences using difflib for speed."""
     if not text1 and not text2:
         return 1.0
     return difflib.SequenceMatcher(None, text1, text2, autojunk=False).ratio()
 
-def process_content(content1, content2, mode):
+# --- Time Budgets ---
+_BUDGET_CHECK_ROWS = 32 # Scorer rows between deadline / stop checks
+_BUDGET_CHECK_WORK = 4096 # GST candidate visits and extension steps between deadline / stop checks
+
+class PairBudgetExceeded(Exception):
+    """Raised inside a scorer when a pair runs past its time budget."""
+
+class ScanCancelled(Exception):
+    """Raised inside a scorer when the scan's stop event is set."""
+
+class PairBudget:
+    """Deadline and stop event a scorer checks while it runs; check() raises PairBudgetExceeded
+    or ScanCancelled, so a pathological pair can neither stall its worker nor cancellation."""
+    __slots__ = ("deadline", "stop_event")
+    def __init__(self, seconds=0.0, stop_event=None):
+        self.deadline = time.perf_counter() + seconds if seconds and seconds > 0 else None
+        self.stop_event = stop_event
+    def check(self):
+        if self.stop_event is not None and self.stop_event.is_set(): raise ScanCancelled()
+        if self.deadline is not None and time.perf_counter() > self.deadline: raise PairBudgetExceeded()
+
+class BudgetedSequenceMatcher(difflib.SequenceMatcher):
+    """SequenceMatcher (autojunk=False, no junk) whose longest-match search, the quadratic part,
+    calls budget.check() every _BUDGET_CHECK_ROWS rows. Results are identical to difflib's."""
+    def __init__(self, a, b, budget):
+        self.budget = budget
+        super().__init__(None, a, b, autojunk=False)
+
+    def find_longest_match(self, alo=0, ahi=None, blo=0, bhi=None):
+        # difflib's own algorithm; the junk extensions are dropped because there is no junk
+        a, b, b2j, check = self.a, self.b, self.b2j, self.budget.check
+        if ahi is None: ahi = len(a)
+        if bhi is None: bhi = len(b)
+        besti, bestj, bestsize = alo, blo, 0
+        j2len, nothing = {}, []
+        for block in range(alo, ahi, _BUDGET_CHECK_ROWS):
+            check()
+            for i in range(block, min(block + _BUDGET_CHECK_ROWS, ahi)):
+                j2lenget, newj2len = j2len.get, {}
+                for j in b2j.get(a[i], nothing):
+                    if j < blo: continue
+                    if j >= bhi: break
+                    k = newj2len[j] = j2lenget(j - 1, 0) + 1
+                    if k > bestsize: besti, bestj, bestsize = i - k + 1, j - k + 1, k
+                j2len = newj2len
+        while besti > alo and bestj > blo and a[besti - 1] == b[bestj - 1]:
+            besti, bestj, bestsize = besti - 1, bestj - 1, bestsize + 1
+        while besti + bestsize < ahi and bestj + bestsize < bhi and a[besti + bestsize] == b[bestj + bestsize]:
+            bestsize += 1
+        return difflib.Match(besti, bestj, bestsize)
+
+# --- Greedy String Tiling (Running-Karp-Rabin, Wise 1993) ---
+DEFAULT_MIN_MATCH = 8           # Shortest token run that counts as a tile
+_GST_INITIAL_SEARCH = 32        # First search length; grows when much longer matches show up
+_GST_HASH_BASE = 1000003
+_GST_HASH_MASK = (1 << 64) - 1
+
+def _unmarked_runs(marked):
+    """Yields (start, end) spans of consecutive unmarked positions."""
+    start = None
+    for position, flag in enumerate(marked):
+        if flag:
+            if start is not None: yield start, position; start = None
+        elif start is None:
+            start = position
+    if start is not None: yield start, len(marked)
+
+def _window_hashes(sequence, marked, length):
+    """Yields (position, hash) for every window of the given length that is fully unmarked."""
+    power = pow(_GST_HASH_BASE, length - 1, _GST_HASH_MASK + 1)
+    for start, end in _unmarked_runs(marked):
+        if end - start < length: continue
+        h = 0
+        for position in range(start, start + length):
+            h = (h * _GST_HASH_BASE + sequence[position] + 1) & _GST_HASH_MASK
+        yield start, h
+        for position in range(start + length, end):
+            h = ((h - (sequence[position - length] + 1) * power) * _GST_HASH_BASE + sequence[position] + 1) & _GST_HASH_MASK
+            yield position - length + 1, h
+
+def _run_ends(marked):
+    """End of the unmarked run each position belongs to (marked positions are left at 0)."""
+    ends = [0] * len(marked)
+    for start, end in _unmarked_runs(marked): ends[start:end] = [end] * (end - start)
+    return ends
+
+def _match_length(a, b, i, j, known, limit):
+    """Length of the common prefix of a[i:i + limit] and b[j:j + limit], whose first `known` tokens
+    are known to match. Compares doubling slices and then bisects, so long runs are scanned in C."""
+    low, step = known, 16
+    while low < limit:
+        high = min(limit, low + step)
+        if a[i + low:i + high] == b[j + low:j + high]:
+            low, step = high, step * 2
+            continue
+        while high - low > 1: # The first mismatch lies in [low, high)
+            middle = (low + high) // 2
+            if a[i + low:i + middle] == b[j + low:j + middle]: low = middle
+            else: high = middle
+        break
+    return low
+
+def _scan_pattern(a, b, marked_a, marked_b, length, budget=None):
+    """Finds maximal unmarked matches of at least `length` tokens. Returns (matches, longest).
+
+    Windows of b are bucketed by hash and then by the token before them, so a window of a skips
+    every candidate that continues a match to its left in one step: each maximal match is only
+    visited, and extended, from its left end. A budget is checked every _BUDGET_CHECK_WORK
+    candidate visits and extension steps."""
+    table = {}
+    for j, h in _window_hashes(b, marked_b, length):
+        previous = b[j - 1] if j and not marked_b[j - 1] else None
+        table.setdefault(h, {}).setdefault(previous, []).append(j)
+    ends_a, ends_b = _run_ends(marked_a), _run_ends(marked_b)
+    matches, longest, work = [], 0, 0
+    for i, h in _window_hashes(a, marked_a, length):
+        buckets = table.get(h)
+        if buckets is None: continue
+        previous = a[i - 1] if i and not marked_a[i - 1] else None
+        for before, candidates in buckets.items():
+            # Same token before both windows: these extend a match found further left
+            if previous is not None and before == previous: continue
+            for j in candidates:
+                if a[i:i + length] != b[j:j + length]: continue # Hash collision
+                k = _match_length(a, b, i, j, length, min(ends_a[i] - i, ends_b[j] - j))
+                matches.append((k, i, j))
+                longest = max(longest, k)
+                work += 1 + k // 64
+                if work >= _BUDGET_CHECK_WORK and budget is not None: budget.check(); work = 0
+    return matches, longest
+
+def greedy_string_tiling(tokens1, tokens2, min_match=DEFAULT_MIN_MATCH, budget=None):
+    """Greedy String Tiling with Running-Karp-Rabin matching over two token-ID sequences.
+
+    Returns (similarity, tiles), where similarity = 2 * covered / (len1 + len2) and tiles is a
+    list of (position1, position2, length) non-overlapping matches. Unlike SequenceMatcher,
+    reordered blocks (e.g. swapped functions) still count as matches. A PairBudget, if given,
+    is checked while matching and while placing tiles."""
+    len1, len2 = len(tokens1), len(tokens2)
+    if not len1 and not len2: return 1.0, []
+    min_match = max(1, min_match)
+    marked1, marked2 = bytearray(len1), bytearray(len2)
+    tiles, covered = [], 0
+    search = max(min_match, min(_GST_INITIAL_SEARCH, len1, len2))
+    while True:
+        matches, longest = _scan_pattern(tokens1, tokens2, marked1, marked2, search, budget)
+        if longest > 2 * search:
+            search = longest # Much longer matches exist: tile those first
+            continue
+        for count, (length, i, j) in enumerate(sorted(matches, reverse=True)):
+            if budget is not None and not count % _BUDGET_CHECK_ROWS: budget.check()
+            # Skip matches occluded by tiles placed earlier in this round
+            if marked1.find(1, i, i + length) >= 0 or marked2.find(1, j, j + length) >= 0: continue
+            marked1[i:i + length] = b"\x01" * length
+            marked2[j:j + length] = b"\x01" * length
+            tiles.append((i, j, length))
+            covered += length
+        if search > 2 * min_match: search //= 2
+        elif search > min_match: search = min_match
+        else: break
+    return 2.0 * covered / (len1 + len2), tiles
+
+SCORERS = ("sequence", "gst")
+
+_TOKENIZERS = {"python": tokenize_python, "c": tokenize_c_cpp, "java": tokenize_java}
+
+def normalize_content(content, mode):
+    """Normalizes a single code snippet into a token list according to the selected analysis mode.
+    Code the language front end cannot handle falls back to basic text tokens."""
+    tokenizer = _TOKENIZERS.get(mode)
+    tokens = tokenizer(content) if tokenizer else None
+    return text_tokens(content) if tokens is None else tokens
+
+def normalize_files(files_content, mode, stop_event=None):
+    """Normalization stage: produces one normalized token list per file.
+    Returns None if the stop_event is set before all files are processed."""
+    normalized = {}
+    for name, content in files_content.items():
+        if stop_event is not None and stop_event.is_set(): return None
+        normalized[name] = normalize_content(content, mode)
+    return normalized
+
+def build_artifact(content, mode):
+    """Normalizes one file and computes its winnowed fingerprints for the candidate index.
+
+    Returns (joined tokens, fingerprints, timings). The tokens come back joined by
+    TOKEN_SEPARATOR, which is cheap to pickle and cache; timings holds the seconds spent
+    per step, including the Clang 'parse'/'tokens' split in C/C++ mode, and 'fallback': 1
+    when the language front end failed and basic text tokens were used instead."""
+    timings, started = {}, time.perf_counter()
+    tokenizer = _TOKENIZERS.get(mode)
+    if mode == "c": tokens = tokenize_c_cpp(content, timings=timings)
+    else: tokens = tokenizer(content) if tokenizer else None
+    if tokens is None:
+        if tokenizer: timings["fallback"] = 1
+        tokens = text_tokens(content)
+    normalized = time.perf_counter()
+    prints = fingerprint.fingerprint(tokens, fingerprint.kgram_length(mode))
+    timings.update(normalize=normalized - started, fingerprint=time.perf_counter() - normalized)
+    return TOKEN_SEPARATOR.join(tokens), prints, timings
+
+def build_artifacts(contents, mode):
+    """Worker task: builds the artifacts of a batch of files, so per-process state such as
+    the Clang Index and the IPC round trip are shared by the whole batch."""
+    return [build_artifact(content, mode) for content in contents]
+
+def artifact_version(mode):
+    """Identifies everything that shapes a cached artifact besides the file content itself."""
+    return f"{NORMALIZER_VERSION}.{fingerprint.kgram_length(mode)}.{fingerprint.WINDOW}" + ("" if backend_available(mode) else ".raw")
+
+def split_joined_tokens(joined_tokens):
+    return joined_tokens.split(TOKEN_SEPARATOR) if joined_tokens else []
+
+def build_template_index(contents, mode):
+    """Builds the base-code exclusion index from template file contents, normalized exactly
+    like the scanned files. Identifiers are category tokens there, so a template region
+    matches wherever it sits in a file and whatever its names were changed to."""
+    index = fingerprint.TemplateIndex()
+    for content in contents:
+        index.add(split_joined_tokens(build_artifact(content, mode)[0]))
+    return index
+
+class TokenVocabulary:
+    """Per-scan mapping of token strings to compact integer IDs."""
+    def __init__(self):
+        self.ids = {}
+    def encode(self, tokens):
+        """Turns a token list into an array('i') of token IDs."""
+        ids = self.ids
+        return array('i', [ids.setdefault(token, len(ids)) for token in tokens])
+
+def compare_normalized(tokens1, tokens2, scorer="sequence", min_match=DEFAULT_MIN_MATCH, budget=None):
+    """Comparison stage: calculates token-level similarity between two precomputed token sequences
+    with the selected scorer ("sequence" for difflib, "gst" for Greedy String Tiling).
+    With a PairBudget, the scorer raises PairBudgetExceeded / ScanCancelled when it runs out."""
+    if scorer == "gst":
+        return greedy_string_tiling(tokens1, tokens2, min_match, budget)[0]
+    if budget is None or not tokens1 and not tokens2:
+        return calculate_similarity_fast(tokens1, tokens2)
+    return BudgetedSequenceMatcher(tokens1, tokens2, budget).ratio()
+
+def score_pair(tokens1, tokens2, scorer="sequence", min_match=DEFAULT_MIN_MATCH, seconds=0.0, stop_event=None):
+    """Scores one pair within a time budget. Returns (similarity, estimated): a pair that runs past
+    `seconds` gets the k-gram estimate instead. Raises ScanCancelled once stop_event is set."""
+    try:
+        return compare_normalized(tokens1, tokens2, scorer, min_match, PairBudget(seconds, stop_event)), False
+    except PairBudgetExceeded:
+        return fingerprint.estimate_similarity(fingerprint.kgram_counts(tokens1), fingerprint.kgram_counts(tokens2)), True
+
+def process_content(content1, content2, mode, scorer="sequence"):
     """Processes two code snippets based on the selected analysis mode and calculates their similarity."""
-    processed1, processed2 = "", ""
-    if mode == "python":
-        processed1 = normalize_python_code(content1)
-        processed2 = normalize_python_code(content2)
-    elif mode == "c":
-        processed1 = normalize_c_cpp_code(content1)
-        processed2 = normalize_c_cpp_code(content2)
-    elif mode == "java":
-        processed1 = normalize_java_code(content1)
-        processed2 = normalize_java_code(content2)
-    else: # Default to basic text analysis
-        processed1 = text_preprocess(content1)
-        processed2 = text_preprocess(content2)
-        
-    return calculate_similarity_fast(processed1, processed2)
+    vocabulary = TokenVocabulary()
+    tokens1, tokens2 = vocabulary.encode(normalize_content(content1, mode)), vocabulary.encode(normalize_content(content2, mode))
+    return compare_normalized(tokens1, tokens2, scorer)
+
+# --- Upper-Bound Pre-Filters ---
+# Both scorers report 2 * matched / (len1 + len2), and neither can match more tokens than
+# the shorter sequence holds (difflib's real_quick_ratio) nor more than the multiset overlap
+# of the two token histograms (difflib's quick_ratio). Pairs whose bound is already below
+# the threshold can be dropped without running the scorer.
+_MAX_HISTOGRAM_CELLS = 50_000_000   # Dense files x vocabulary histogram limit for the NumPy path
+_HISTOGRAM_BATCH_CELLS = 4_000_000  # Pairs x vocabulary cells compared per vectorized batch
+
+def _ratio_bound(matched, total):
+    return 2.0 * matched / total if total else 1.0
+
+def prefilter_pairs(artifacts, pairs, threshold):
+    """Runs the length-ratio and token-histogram bounds over candidate (i, j) pairs.
+    Returns (surviving pairs, {"length": eliminated, "histogram": eliminated})."""
+    eliminated = {"length": 0, "histogram": 0}
+    if threshold <= 0 or not pairs: return pairs, eliminated
+    if NUMPY_AVAILABLE:
+        return _prefilter_pairs_numpy(artifacts, pairs, threshold, eliminated)
+
+    lengths = [len(tokens) for tokens in artifacts]
+    survivors = [(i, j) for i, j in pairs if _ratio_bound(min(lengths[i], lengths[j]), lengths[i] + lengths[j]) >= threshold]
+    eliminated["length"] = len(pairs) - len(survivors)
+    histograms = [Counter(tokens) for tokens in artifacts]
+    pairs, survivors = survivors, []
+    for i, j in pairs:
+        small, large = sorted((histograms[i], histograms[j]), key=len)
+        overlap = sum(min(count, large[token]) for token, count in small.items())
+        if _ratio_bound(overlap, lengths[i] + lengths[j]) >= threshold: survivors.append((i, j))
+    eliminated["histogram"] = len(pairs) - len(survivors)
+    return survivors, eliminated
+
+def _vector_bounds(matched, total):
+    import numpy as np
+    return np.where(total > 0, 2.0 * matched / np.maximum(total, 1), 1.0)
+
+def _prefilter_pairs_numpy(artifacts, pairs, threshold, eliminated):
+    import numpy as np
+    index = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    lengths = np.fromiter((len(tokens) for tokens in artifacts), dtype=np.int64, count=len(artifacts))
+    first, second = lengths[index[:, 0]], lengths[index[:, 1]]
+    keep = _vector_bounds(np.minimum(first, second), first + second) >= threshold
+    eliminated["length"] = int(len(index) - keep.sum())
+    index = index[keep]
+
+    vocabulary_size = max((max(tokens) for tokens in artifacts if tokens), default=-1) + 1
+    if len(index) and len(artifacts) * vocabulary_size <= _MAX_HISTOGRAM_CELLS:
+        histograms = np.zeros((len(artifacts), vocabulary_size), dtype=np.int32)
+        for row, tokens in enumerate(artifacts):
+            if tokens: histograms[row] = np.bincount(np.asarray(tokens, dtype=np.int64), minlength=vocabulary_size)
+        step, keep = max(1, _HISTOGRAM_BATCH_CELLS // vocabulary_size), []
+        for start in range(0, len(index), step):
+            batch = index[start:start + step]
+            overlap = np.minimum(histograms[batch[:, 0]], histograms[batch[:, 1]]).sum(axis=1)
+            keep.append(_vector_bounds(overlap, lengths[batch[:, 0]] + lengths[batch[:, 1]]) >= threshold)
+        keep = np.concatenate(keep)
+        eliminated["histogram"] = int(len(index) - keep.sum())
+        index = index[keep]
+    return [(int(i), int(j)) for i, j in index], eliminated
+
+# --- Progress Reporting ---
+class ScanProgress:
+    """Progress channel between the scan thread and whoever displays it.
+
+    The scan thread only bumps a lock-protected counter; the UI (or CLI) polls snapshot()
+    at its own fixed rate. Throughput is an exponentially weighted moving average of the
+    rates seen between polls, so the ETA follows recent speed rather than the overall mean."""
+    def __init__(self, time_constant=10.0, sample_interval=1.0):
+        self._lock = threading.Lock()
+        self.time_constant, self.sample_interval = time_constant, sample_interval
+        self.current, self.total, self.files = 0, 0, 0
+        self._rate, self._last_sample = None, None
+
+    def set_total(self, total):
+        with self._lock:
+            self.total = total
+            self.current = min(self.current, total)
+
+    def advance(self, count=1):
+        with self._lock:
+            self.current += count
+
+    def files_loaded(self, count=1):
+        """Counts files read and handed to normalization, before the pair total is known."""
+        with self._lock:
+            self.files += count
+
+    def snapshot(self):
+        """Returns (current, total, smoothed items per second or None) and updates the rate estimate."""
+        now = time.monotonic()
+        with self._lock:
+            current, total = self.current, self.total
+        if self._last_sample is None or current < self._last_sample[1]:
+            self._last_sample = (now, current)
+        elif now - self._last_sample[0] >= self.sample_interval:
+            elapsed = now - self._last_sample[0]
+            rate = (current - self._last_sample[1]) / elapsed
+            weight = 1.0 - math.exp(-elapsed / self.time_constant)
+            self._rate = rate if self._rate is None else self._rate + weight * (rate - self._rate)
+            self._last_sample = (now, current)
+        return current, total, self._rate
+
+    def eta_seconds(self, current, total, rate):
+        if not rate or rate <= 0: return None
+        return max(0, total - current) / rate
+
+# --- Parallel Scan Engine ---
+DEFAULT_CHUNK_SIZE = 2000 # Most pairs per worker task, keeps IPC overhead per comparison small
+STREAM_CHUNK_SIZE = 50 # Pairs scored in-thread between hand-offs to the result store; also the fewest per worker task
+CHUNKS_PER_WORKER = 8 # Worker tasks per worker, so all workers get work and progress moves in small steps
+NORMALIZE_BATCH_SIZE = 64 # Files hashed, looked up in the cache and sent to a worker together
+NORMALIZE_CACHE_FLUSH = 1024 # Freshly normalized artifacts buffered per cache write (each write may evict)
+SLOWEST_N = 10 # Slowest files and pairs kept in the scan stats
+CANCEL_POLL_SECONDS = 0.2 # Longest wait on worker results before the stop event is checked again
+CANCEL_DRAIN_SECONDS = 2.0 # Longest wait, once stopped, for workers to hand back the pairs they already scored
+CHECKPOINT_SECONDS = 60 # Pair scores of a running scan are written to the score cache this often
+# Worker pools start fresh interpreters: forking while the file discovery and loading threads
+# hold locks (I/O buffers, the import lock, SQLite) can leave a worker deadlocked on one of them
+_POOL_CONTEXT = multiprocessing.get_context("spawn")
+
+def resolve_worker_count(workers):
+    """Turns the 'workers' setting into a process count (0 or invalid means all cores)."""
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        workers = 0
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+# Normalized artifacts, scorer settings, the per-pair budget and the scan's cancel event,
+# shipped once to each comparison worker by the pool initializer
+_worker_artifacts, _worker_scorer, _worker_budget = None, ("sequence", DEFAULT_MIN_MATCH), (0.0, None)
+
+def _ignore_interrupts():
+    """Pool initializer: Ctrl-C reaches the whole process group, but only the parent should react to
+    it (by stopping the scan and writing its checkpoint), so a worker must not die mid-chunk."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _init_compare_worker(artifacts, scorer, min_match, pair_budget, cancel_event):
+    global _worker_artifacts, _worker_scorer, _worker_budget
+    _ignore_interrupts()
+    _worker_artifacts, _worker_scorer, _worker_budget = artifacts, (scorer, min_match), (pair_budget, cancel_event)
+
+def _compare_chunk(pairs):
+    """Worker task: scores a chunk of (i, j) index pairs against the shipped artifacts. Returns
+    ([(i, j, similarity)], [(i, j) estimated], scoring seconds, heap of the SLOWEST_N (seconds, i, j)).
+    Returns early with the pairs scored so far as soon as the scan's cancel event is set, even
+    in the middle of a pair, so a stopped scan can still checkpoint them."""
+    scores, estimated, slowest, total = [], [], [], 0.0
+    scorer, min_match = _worker_scorer
+    seconds, cancel_event = _worker_budget
+    for i, j in pairs:
+        started = time.perf_counter()
+        try:
+            similarity, flagged = score_pair(_worker_artifacts[i], _worker_artifacts[j], scorer, min_match, seconds, cancel_event)
+        except ScanCancelled: break
+        elapsed = time.perf_counter() - started
+        scores.append((i, j, similarity))
+        if flagged: estimated.append((i, j))
+        total += elapsed
+        _keep_slowest(slowest, (elapsed, i, j))
+    return scores, estimated, total, slowest
+
+def _keep_slowest(heap, item):
+    if len(heap) < SLOWEST_N: heapq.heappush(heap, item)
+    elif item > heap[0]: heapq.heapreplace(heap, item)
+
+def _pair_key(hash1, hash2):
+    return (hash1, hash2) if hash1 <= hash2 else (hash2, hash1)
+
+def duplicate_groups(keys):
+    """Groups equal keys (e.g. normalized outputs): returns member index lists in first-seen order."""
+    groups = {}
+    for i, key in enumerate(keys): groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+def checkpoint_key(scope, mode, scorer, shard=None):
+    """Key of a scan's checkpoint in the PairScoreCache: (folder scope, mode, scorer). Each shard
+    of a sharded scan checkpoints separately."""
+    if shard is not None: scope = f"{scope} [shard {shard[0] + 1}/{shard[1]}]"
+    return (scope, mode, scorer if scorer in SCORERS else "sequence")
+
+def shard_of(hash1, hash2, count):
+    """Shard (0..count-1) of the pair of files with these content hashes. It depends on the contents
+    only, so every machine assigns a pair to the same shard whatever the file order or path."""
+    return (int(hash1[:16], 16) ^ int(hash2[:16], 16)) % count
+
+def file_set_digest(names, hashes):
+    """Digest of a scan's (name, content hash) list; shards of one scan must agree on it."""
+    return content_hash("\n".join(f"{name}\0{digest}" for name, digest in zip(names, hashes)))
+
+def compare_chunk_size(pair_count, workers, largest=DEFAULT_CHUNK_SIZE):
+    """Pairs per worker task: about CHUNKS_PER_WORKER tasks per worker, within [STREAM_CHUNK_SIZE, largest]."""
+    return max(min(STREAM_CHUNK_SIZE, largest), min(largest, -(-pair_count // (max(1, workers) * CHUNKS_PER_WORKER))))
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk: return
+        yield chunk
+
+class ScanEngine:
+    """Runs the two-phase scan (normalize, then compare candidate pairs) over a process pool.
+
+    - Normalization: files already in the NormalizationCache (same content, mode and
+      normalizer version) are loaded instead of parsed again; byte-identical files are parsed once.
+    - Templates: with a TemplateIndex, regions matching the base code are stripped from every
+      normalized stream (once per file) before anything else looks at it.
+    - Duplicates: files with identical normalized output form a group scored 100% internally;
+      only its first member is compared further, and its scores are copied to the other members.
+    - Candidates: with use_index and a threshold above 0, only pairs sharing a winnowed
+      fingerprint are kept; with approximate (and NumPy available), MinHash/LSH banding
+      tuned to the threshold is used.
+    - Reuse: with a PairScoreCache and a scope (e.g. the scanned folder), scores of pairs
+      whose contents are unchanged since an earlier scan are taken over. Fresh scores are
+      written every checkpoint_seconds and when the scan is stopped, together with a
+      checkpoint row (checkpoint_key) that is cleared once the scan completes, so an
+      interrupted scan resumes from where it stopped.
+    - Pre-filters: pairs whose length or token-histogram bound misses the threshold are dropped.
+    - Scoring: the remaining pairs are scored with the selected scorer ("sequence" or "gst").
+      A pair running longer than pair_budget seconds, or involving a file of more than
+      max_file_size characters, gets a k-gram estimate instead and is flagged as estimated.
+      Cancellation interrupts pairs in progress, also inside worker processes.
+    - Sharding: with shard=(index, count), only the candidate pairs shard_of assigns to index
+      are scored (and exact-duplicate pairs only by shard 0), so count runs on different
+      machines cover the scan exactly once; merge their results with results.merge_result_files.
+
+    Scores stream into self.results (a ResultStore) as chunks finish, and a ScanProgress, if
+    given, is advanced per scored pair. Counts and wall-clock seconds for every stage, parse
+    fallbacks and the SLOWEST_N files and pairs end up in self.stats (see scan_report). With
+    profile, the scanning thread runs under cProfile (self.profiler); worker processes are
+    not profiled, so use workers=1 to see normalization and scoring. run() returns the
+    ResultStore, or None if the stop_event was set."""
+    def __init__(self, mode, workers=0, stop_event=None, progress=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 use_index=True, approximate=False, threshold=0.0, cache=None, score_cache=None, scope=None,
+                 scorer="sequence", min_match=DEFAULT_MIN_MATCH, top_k=DEFAULT_TOP_K, template=None, profile=False,
+                 max_file_size=0, pair_budget=0.0, checkpoint_seconds=CHECKPOINT_SECONDS, shard=None):
+        self.mode = mode
+        self.scorer = scorer if scorer in SCORERS else "sequence"
+        self.min_match = min_match
+        self.workers = resolve_worker_count(workers)
+        self.stop_event = stop_event
+        self.progress = progress
+        self.chunk_size = max(1, chunk_size)
+        self.use_index = use_index
+        self.approximate = approximate
+        self.threshold = threshold
+        self.top_k = top_k
+        self.cache = cache
+        self.score_cache = score_cache
+        self.scope = scope
+        self.template = template if template else None
+        self.profile = profile
+        self.max_file_size = max(0, max_file_size or 0)
+        self.pair_budget = max(0.0, pair_budget or 0.0)
+        self.checkpoint_seconds = checkpoint_seconds
+        if shard is not None and not 0 <= shard[0] < shard[1]: raise ValueError(f"Invalid shard {shard[0]} of {shard[1]}")
+        self.shard = tuple(shard) if shard is not None else None
+        self.profiler = None
+        self.file_timings = {}
+        self.results = None
+        self.stats = {}
+        self._slow_pairs, self._compare_seconds = [], 0.0
+
+    def _stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def _set_total(self, total):
+        if self.progress is not None: self.progress.set_total(total)
+
+    def _advance(self, count):
+        if self.progress is not None: self.progress.advance(count)
+
+    def _files_loaded(self, count):
+        if self.progress is not None: self.progress.files_loaded(count)
+
+    def checkpoint_key(self):
+        return checkpoint_key(self.scope, self.mode, self.scorer, self.shard)
+
+    def score_scope(self):
+        """PairScoreCache scope of this scan: scores are only reused under the same folder,
+        normalizer, scorer settings and base code. Needs a score_cache."""
+        parts = [self.scope, self.mode, artifact_version(self.mode), self.scorer, self.min_match]
+        if self.template is not None: parts.append(self.template.digest())
+        return self.score_cache.make_scope(*parts)
+
+    def _lap(self, stage, started):
+        """Adds the seconds since started to stats['stage_seconds'][stage]; returns the current time."""
+        now = time.perf_counter()
+        stages = self.stats.setdefault("stage_seconds", {})
+        stages[stage] = stages.get(stage, 0.0) + now - started
+        return now
+
+    def run(self, files):
+        """files is a {name: content} dict or an iterable of (name, content) pairs, which is
+        consumed lazily so normalization starts while the files are still being read."""
+        self.stats, self._slow_pairs, self._compare_seconds = {"mode": self.mode, "scorer": self.scorer}, [], 0.0
+        self.profiler = cProfile.Profile() if self.profile else None
+        started = time.perf_counter()
+        if self.profiler is not None: self.profiler.enable()
+        try:
+            return self._run(files)
+        finally:
+            if self.profiler is not None: self.profiler.disable()
+            self._lap("total", started)
+
+    def _run(self, files):
+        lap = time.perf_counter()
+        loaded = self.normalize(files.items() if isinstance(files, dict) else files)
+        if loaded is None: return None
+        lap = self._lap("normalize", lap)
+        names, hashes, built, sizes = loaded
+        total_pairs = len(names) * (len(names) - 1) // 2
+        self.stats.update(files=len(names), pairs_total=total_pairs, pairs_pruned=0, pairs_scored=0, pairs_reused=0,
+                          file_set=file_set_digest(names, hashes))
+        self._set_total(total_pairs)
+
+        self.stats["file_timings"] = {names[i]: timings for i, timings in self.file_timings.items()}
+        timing_totals = Counter()
+        for timings in self.file_timings.values(): timing_totals.update(timings)
+        self.stats["parse_fallbacks"] = timing_totals.pop("fallback", 0)
+        self.stats["timing_totals"] = dict(timing_totals)
+        # (name, seconds, per-step seconds): the steps include Clang's parse/tokens split in C/C++ mode
+        self.stats["slowest_files"] = heapq.nlargest(SLOWEST_N, ((names[i], timings.get("normalize", 0.0) + timings.get("fingerprint", 0.0),
+                                                                  {step: seconds for step, seconds in timings.items() if step != "fallback"})
+                                                                 for i, timings in self.file_timings.items()), key=lambda item: item[1])
+        if self.template is not None:
+            built = self.strip_template(built)
+            lap = self._lap("template", lap)
+
+        # Files with identical normalized output form one group; only its first member is compared
+        groups = duplicate_groups([joined_tokens for joined_tokens, _ in built])
+        representatives = [members[0] for members in groups]
+        group_ids = [0] * len(names)
+        for group_id, members in enumerate((members for members in groups if len(members) > 1), 1):
+            for i in members: group_ids[i] = group_id
+        self.results = ResultStore(names, self.threshold, self.top_k, group_ids)
+        duplicates = [(i, j, 1.0) for members in groups for i, j in itertools.combinations(members, 2)]
+        if self.shard is None or self.shard[0] == 0: self.results.extend(duplicates)
+        self.stats.update(duplicate_groups=max(group_ids, default=0), duplicate_files=sum(1 for group_id in group_ids if group_id),
+                          duplicate_pairs=len(duplicates))
+        del duplicates
+        lap = self._lap("duplicates", lap)
+
+        def expand(rep_scores):
+            # Scores between representatives hold for every member of both groups
+            return [(min(i, j), max(i, j), similarity) for r1, r2, similarity in rep_scores
+                    for i in groups[r1] for j in groups[r2]]
+
+        vocabulary = TokenVocabulary()
+        artifacts = [vocabulary.encode(split_joined_tokens(built[i][0])) for i in representatives]
+        rep_hashes = [hashes[i] for i in representatives]
+        # Files over the size cap are only ever estimated; their quadratic scoring is skipped outright
+        oversized = {r for r, i in enumerate(representatives) if self.max_file_size and sizes[i] > self.max_file_size}
+        self.stats["oversized_files"] = sum(1 for size in sizes if self.max_file_size and size > self.max_file_size)
+        pairs = self.candidate_pairs([built[i][1] for i in representatives])
+        self.stats["pairs_pruned"] = len(representatives) * (len(representatives) - 1) // 2 - len(pairs)
+        if self.shard is not None:
+            index, count = self.shard
+            kept = [(i, j) for i, j in pairs if shard_of(rep_hashes[i], rep_hashes[j], count) == index]
+            self.stats.update(shard=[index + 1, count], pairs_other_shards=len(pairs) - len(kept))
+            pairs = kept
+        lap = self._lap("candidates", lap)
+
+        known, scope = {}, None
+        if self.score_cache is not None and self.scope is not None:
+            scope = self.score_scope()
+            try:
+                known = self.score_cache.load(scope)
+                # A checkpoint saved under other settings (min_match, base code...) has nothing to reuse here
+                saved = self.score_cache.checkpoint(self.checkpoint_key())
+                if saved is not None and saved["scope"] == scope: self.stats["resumed"] = True
+            except Exception as e:
+                print(f"Score cache read error: {e}")
+        reused, pending = [], []
+        for i, j in pairs:
+            score = known.get(_pair_key(rep_hashes[i], rep_hashes[j]))
+            if score is None: pending.append((i, j))
+            else: reused.append((i, j, score))
+        self.stats["pairs_reused"] = len(reused)
+        self.results.extend(expand(reused))
+        del reused
+        pending, eliminated = prefilter_pairs(artifacts, pending, self.threshold)
+        self.stats.update(prefilter_length=eliminated["length"], prefilter_histogram=eliminated["histogram"])
+        self.results.skipped = self.stats["pairs_pruned"] + eliminated["length"] + eliminated["histogram"]
+        lap = self._lap("prefilter", lap)
+
+        fresh, estimated_pairs = PairArrays(), set()
+        settled = self.stats["pairs_reused"] + eliminated["length"] + eliminated["histogram"]
+        written, last_checkpoint = 0, time.perf_counter()
+
+        def save_scores(finished):
+            # Writes the scores added since the last call; the checkpoint row lives until the scan finishes
+            nonlocal written, last_checkpoint
+            start, written, last_checkpoint = written, len(fresh), time.perf_counter()
+            # Estimates are not kept: a later scan with a larger budget should score those pairs for real
+            entries = ((_pair_key(rep_hashes[i], rep_hashes[j]), similarity)
+                       for i, j, similarity in zip(fresh.first[start:], fresh.second[start:], fresh.scores[start:])
+                       if (i, j) not in estimated_pairs)
+            try:
+                self.score_cache.store(scope, entries)
+                if finished: self.score_cache.clear_checkpoint(self.checkpoint_key())
+                else: self.score_cache.save_checkpoint(self.checkpoint_key(), scope, len(names), settled + len(fresh), len(pairs))
+            except Exception as e:
+                print(f"Score cache write error: {e}")
+
+        def collect(scores, estimated):
+            self.results.extend(expand(scores), [(i, j) for i, j, _ in expand([(i, j, 0.0) for i, j in estimated])])
+            for i, j, similarity in scores: fresh.append(i, j, similarity)
+            estimated_pairs.update(estimated)
+            if scope is not None and self.checkpoint_seconds and time.perf_counter() - last_checkpoint >= self.checkpoint_seconds:
+                save_scores(False)
+        if not self.compare(artifacts, pending, collect, oversized):
+            if scope is not None: save_scores(False) # Keep what was scored, so the next scan resumes here
+            return None
+        lap = self._lap("compare", lap)
+        self.stats.update(pairs_scored=len(fresh), pairs_estimated=len(estimated_pairs), compare_seconds=self._compare_seconds,
+                          slowest_pairs=[(names[representatives[i]], names[representatives[j]], seconds)
+                                         for seconds, i, j in sorted(self._slow_pairs, reverse=True)])
+        if scope is not None:
+            save_scores(True)
+            self._lap("score_cache", lap)
+        return self.results
+
+    def strip_template(self, built):
+        """Removes template regions from every normalized stream and refingerprints the files that changed."""
+        stripped, files, removed = [], 0, 0
+        for joined_tokens, prints in built:
+            tokens, count = self.template.strip(split_joined_tokens(joined_tokens))
+            if count:
+                files, removed = files + 1, removed + count
+                joined_tokens, prints = TOKEN_SEPARATOR.join(tokens), fingerprint.fingerprint(tokens, fingerprint.kgram_length(self.mode))
+            stripped.append((joined_tokens, prints))
+        self.stats.update(template_files=files, template_tokens=removed)
+        return stripped
+
+    def candidate_pairs(self, fingerprints):
+        """Chooses the candidate generation strategy and records it in self.stats."""
+        if self.approximate and fingerprint.NUMPY_AVAILABLE and self.threshold > 0:
+            pairs, recall = fingerprint.lsh_candidate_pairs(fingerprints, self.threshold)
+            self.stats.update(candidates="lsh", lsh_recall=recall)
+            return pairs
+        # Without a threshold every pair is wanted, and pairs the index prunes would go missing from the results
+        if self.use_index and self.threshold > 0:
+            self.stats["candidates"] = "index"
+            return fingerprint.candidate_pairs(fingerprints)
+        self.stats["candidates"] = "all"
+        return list(itertools.combinations(range(len(fingerprints)), 2))
+
+    def normalize(self, files):
+        """Phase 1: hashes and normalizes (name, content) pairs in batches as they arrive, so parsing
+        overlaps with whatever produces the stream (e.g. threaded reads from discovery.load_files).
+        Returns (names, hashes, [(joined tokens, fingerprints)], sizes in characters) ordered by name,
+        or None if stopped.
+        Byte-identical files are normalized once and share the artifact.
+        Per-step timings of freshly normalized files are kept in self.file_timings by file index."""
+        names, hashes, built, sizes, timings_by_file = [], [], [], [], {}
+        first_by_hash, copies = {}, [] # copies: (file index, index of the first file with the same content)
+        version = artifact_version(self.mode)
+        executor, pending, unsaved = None, deque(), []
+        waited, characters = 0.0, 0
+
+        def timed(stream):
+            # Time spent blocked on the input is time the reads (not the parsers) are behind
+            nonlocal waited
+            iterator = iter(stream)
+            while True:
+                started = time.perf_counter()
+                item = next(iterator, None)
+                waited += time.perf_counter() - started
+                if item is None: return
+                yield item
+
+        def finish(indices, keys, artifacts):
+            for i, key, (joined_tokens, prints, timings) in zip(indices, keys, artifacts):
+                built[i] = (joined_tokens, prints)
+                timings_by_file[i] = timings
+                if self.cache is not None: unsaved.append((key, joined_tokens, prints))
+            if len(unsaved) >= NORMALIZE_CACHE_FLUSH: self._save_artifacts(unsaved)
+
+        def drain(block_until):
+            while len(pending) > block_until or (pending and pending[0][2].done()):
+                if not pending[0][2].done():
+                    # Wait in slices so a stop request is seen while a batch is still parsing
+                    wait([pending[0][2]], timeout=CANCEL_POLL_SECONDS)
+                    if self._stopped(): return False
+                    continue
+                indices, keys, future = pending.popleft()
+                finish(indices, keys, future.result())
+                if self._stopped(): return False
+            return True
+
+        try:
+            for batch in _chunked(timed(files), NORMALIZE_BATCH_SIZE):
+                if self._stopped(): return None
+                start = len(names)
+                sizes.extend(len(content) for _, content in batch)
+                characters += sum(sizes[start:])
+                names.extend(name for name, _ in batch)
+                hashes.extend(content_hash(content) for _, content in batch)
+                built.extend([None] * len(batch))
+                unique = []
+                for offset in range(len(batch)):
+                    first = first_by_hash.setdefault(hashes[start + offset], start + offset)
+                    if first == start + offset: unique.append(offset)
+                    else: copies.append((start + offset, first))
+                keys = [None] * len(batch)
+                if self.cache is not None:
+                    for offset in unique: keys[offset] = self.cache.make_key(hashes[start + offset], self.mode, version)
+                    try:
+                        cached = self.cache.get_many([keys[offset] for offset in unique])
+                        for offset in unique: built[start + offset] = cached.get(keys[offset])
+                    except Exception as e:
+                        print(f"Cache read error: {e}")
+
+                missing = [offset for offset in unique if built[start + offset] is None]
+                indices, contents = [start + offset for offset in missing], [batch[offset][1] for offset in missing]
+                missing_keys = [keys[offset] for offset in missing]
+                # A full batch is enough work for a pool even when there are more workers than files in it
+                if executor is None and self.workers > 1 and len(missing) >= min(2 * self.workers, NORMALIZE_BATCH_SIZE):
+                    executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_POOL_CONTEXT, initializer=_ignore_interrupts)
+                if executor is None or not missing:
+                    artifacts = []
+                    for content in contents:
+                        if self._stopped(): return None
+                        artifacts.append(build_artifact(content, self.mode))
+                    finish(indices, missing_keys, artifacts)
+                else:
+                    pending.append((indices, missing_keys, executor.submit(build_artifacts, contents, self.mode)))
+                self._files_loaded(len(batch))
+                # Bounded hand-off: stop pulling files while the workers are this far behind
+                if not drain(self.workers * 2): return None
+            if not drain(0): return None
+        finally:
+            if executor is not None: executor.shutdown(wait=not self._stopped(), cancel_futures=True)
+            # Also on stop: files normalized so far are not parsed again by the next scan
+            if self.cache is not None and unsaved: self._save_artifacts(unsaved)
+        for i, first in copies: built[i] = built[first]
+
+        self.stats.update(cache_hits=len(names) - len(copies) - len(timings_by_file), cache_misses=len(timings_by_file), raw_duplicates=len(copies),
+                          input_chars=characters, read_wait_seconds=waited)
+        # Arrival order depends on I/O timing; order by name so pair indices are reproducible
+        order = sorted(range(len(names)), key=names.__getitem__)
+        rank = {old: new for new, old in enumerate(order)}
+        self.file_timings = {rank[i]: timings for i, timings in timings_by_file.items()}
+        return [names[i] for i in order], [hashes[i] for i in order], [built[i] for i in order], [sizes[i] for i in order]
+
+    def _estimate(self, artifacts, pairs, oversized, sink):
+        """Scores pairs involving an oversized file with the k-gram estimate; the oversized
+        files' k-gram counts are built once and reused for all of their pairs."""
+        cached = {}
+        def kgrams(k):
+            if k not in oversized: return fingerprint.kgram_counts(artifacts[k])
+            if k not in cached: cached[k] = fingerprint.kgram_counts(artifacts[k])
+            return cached[k]
+        for chunk in _chunked(pairs, STREAM_CHUNK_SIZE):
+            if self._stopped(): return False
+            scores = [(i, j, fingerprint.estimate_similarity(kgrams(i), kgrams(j))) for i, j in chunk]
+            sink(scores, chunk)
+            self._advance(len(scores))
+        return True
+
+    def profile_report(self, top=25):
+        """Returns the cProfile top functions by cumulative time as text, or "" if not profiled."""
+        if self.profiler is None: return ""
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        return stream.getvalue()
+
+    def _save_artifacts(self, unsaved):
+        try:
+            self.cache.put_many(unsaved)
+        except Exception as e:
+            print(f"Cache write error: {e}")
+        unsaved.clear()
+
+    def compare(self, artifacts, pairs, sink, oversized=()):
+        """Phase 2: scores every (i, j) pair and passes each finished chunk to sink(scores, estimated):
+        (i, j, similarity) tuples and the (i, j) pairs among them whose similarity is a k-gram
+        estimate. Pairs with a file in oversized are estimated directly. Returns False if the
+        stop_event was set."""
+        self._set_total(len(pairs))
+        if oversized:
+            capped = [(i, j) for i, j in pairs if i in oversized or j in oversized]
+            if capped:
+                pairs = [(i, j) for i, j in pairs if i not in oversized and j not in oversized]
+                if not self._estimate(artifacts, capped, oversized, sink): return False
+        chunk_size = compare_chunk_size(len(pairs), self.workers, self.chunk_size)
+        if self.workers == 1 or len(pairs) <= chunk_size:
+            for chunk in _chunked(pairs, STREAM_CHUNK_SIZE):
+                scores, estimated = [], []
+                for i, j in chunk:
+                    if self._stopped(): break
+                    started = time.perf_counter()
+                    try:
+                        similarity, flagged = score_pair(artifacts[i], artifacts[j], self.scorer, self.min_match, self.pair_budget, self.stop_event)
+                    except ScanCancelled: break
+                    elapsed = time.perf_counter() - started
+                    scores.append((i, j, similarity))
+                    if flagged: estimated.append((i, j))
+                    self._compare_seconds += elapsed
+                    _keep_slowest(self._slow_pairs, (elapsed, i, j))
+                    self._advance(1)
+                sink(scores, estimated) # Also on stop, so the pairs scored so far are checkpointed
+                if self._stopped(): return False
+            return True
+
+        def take(futures):
+            for future in futures:
+                if future.cancelled(): continue
+                scores, estimated, seconds, slowest = future.result()
+                sink(scores, estimated)
+                self._compare_seconds += seconds
+                for item in slowest: _keep_slowest(self._slow_pairs, item)
+                self._advance(len(scores))
+
+        cancel_event = _POOL_CONTEXT.Event()
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_POOL_CONTEXT, initializer=_init_compare_worker,
+                                       initargs=(artifacts, self.scorer, self.min_match, self.pair_budget, cancel_event))
+        try:
+            chunks, pending = _chunked(pairs, chunk_size), set()
+            max_in_flight = self.workers * 2
+            while True:
+                # Keep a bounded number of chunks in flight so cancellation stays responsive
+                for chunk in itertools.islice(chunks, max_in_flight - len(pending)):
+                    pending.add(executor.submit(_compare_chunk, chunk))
+                if not pending: return True
+                finished, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                if self._stopped():
+                    # Workers abandon the pair they are on at their next budget check and hand back what they scored
+                    cancel_event.set()
+                    for future in pending: future.cancel()
+                    drained, _ = wait(pending, timeout=CANCEL_DRAIN_SECONDS)
+                    take(finished | drained)
+                    return False
+                take(finished)
+        finally:
+            executor.shutdown(wait=not self._stopped(), cancel_futures=True)
+
+def scan_report(stats):
+    """Returns a JSON-ready copy of ScanEngine.stats without the per-file timings, which grow with the corpus."""
+    return {key: value for key, value in stats.items() if key != "file_timings"}
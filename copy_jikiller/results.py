@@ -0,0 +1,260 @@
+import json
+import heapq
+import bisect
+import threading
+from array import array
+
+DEFAULT_TOP_K = 5000 # Best below-threshold pairs kept for context
+SCORE, FILE1, FILE2, GROUP, ESTIMATED = 0, 1, 2, 3, 4 # Row layout: (score, file1, file2, duplicate group or 0, estimated)
+
+# --- Results files (sharded scans, merge, loading into the GUI) ---
+RESULTS_FORMAT, RESULTS_VERSION = "copy_jikiller-results", 1
+SHARED_COUNTERS = ("files", "pairs_total", "pairs_pruned", "duplicate_groups", "duplicate_files", "duplicate_pairs",
+                   "template_files", "template_tokens", "oversized_files") # Equal in every shard of a scan
+SUMMED_COUNTERS = ("pairs_scored", "pairs_reused", "pairs_estimated", "prefilter_length", "prefilter_histogram") # Per shard
+MATCHING_KEYS = ("directory", "mode", "scorer", "threshold", "file_set") # Shards of one scan agree on these
+
+def as_stored(score):
+    """Rounds a score the way PairArrays stores it, so bounds like 0.7 still match stored 0.7 rows."""
+    return array('f', (score,))[0]
+
+class PairArrays:
+    """Parallel arrays of (first file index, second file index, score).
+    About 12 bytes per pair instead of a tuple of Python objects."""
+    __slots__ = ("first", "second", "scores")
+    def __init__(self):
+        self.first, self.second, self.scores = array('I'), array('I'), array('f')
+    def append(self, i, j, score):
+        self.first.append(i); self.second.append(j); self.scores.append(score)
+    def __len__(self):
+        return len(self.scores)
+    def __iter__(self):
+        return zip(self.first, self.second, self.scores)
+
+class ResultStore:
+    """Thread-safe store the scan engine streams scored pairs into.
+
+    Pairs at or above the threshold are all kept in PairArrays; below-threshold pairs only
+    survive in a bounded min-heap of the top_k best, so memory does not grow with the full
+    n^2 pair space. The UI drains newly added above-threshold rows with take_new() while
+    the scan runs. group_ids marks files of the same exact-duplicate group (0 = no group).
+    Pairs whose score is a k-gram estimate (over the time budget or file size cap) are
+    remembered in estimated, a set of (i, j), and flagged in their rows."""
+    def __init__(self, names, threshold=0.0, top_k=DEFAULT_TOP_K, group_ids=None):
+        self.names = list(names)
+        self.group_ids = group_ids or [0] * len(self.names)
+        self.threshold = threshold
+        self.top_k = max(0, top_k)
+        self.above = PairArrays()
+        self._below = [] # (score, i, j) min-heap
+        self._taken = 0
+        self.dropped = 0 # Below-threshold pairs pushed out of the heap
+        self.skipped = 0 # Pairs never scored (index pruning, prefilters); set by the engine
+        self.estimated = set()
+        self._lock = threading.Lock()
+
+    def extend(self, triples, estimated=()):
+        """Adds (i, j, score) tuples; estimated lists the (i, j) pairs among them whose score is an estimate."""
+        with self._lock:
+            self.estimated.update(estimated)
+            below, top_k = self._below, self.top_k
+            for i, j, score in triples:
+                if score >= self.threshold:
+                    self.above.append(i, j, score)
+                elif len(below) < top_k:
+                    heapq.heappush(below, (score, i, j))
+                elif top_k and score > below[0][0]:
+                    heapq.heapreplace(below, (score, i, j))
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+
+    def _row(self, i, j, score):
+        group = self.group_ids[i] if self.group_ids[i] == self.group_ids[j] else 0
+        return score, self.names[i], self.names[j], group, (i, j) in self.estimated
+
+    def take_new(self):
+        """Returns the (score, file1, file2, group, estimated) rows at or above the threshold added since the last call."""
+        with self._lock:
+            start, self._taken = self._taken, len(self.above)
+            first, second, scores = self.above.first[start:], self.above.second[start:], self.above.scores[start:]
+        return [self._row(i, j, score) for i, j, score in zip(first, second, scores)]
+
+    def ranked(self, include_below=False):
+        """Returns kept rows as (score, file1, file2, group, estimated) sorted by score, best first."""
+        with self._lock:
+            triples = list(self.above)
+            if include_below:
+                triples.extend((i, j, score) for score, i, j in self._below)
+        triples.sort(key=lambda triple: triple[2], reverse=True)
+        return [self._row(i, j, score) for i, j, score in triples]
+
+    def complete_from(self):
+        """Lowest threshold the kept rows are exhaustive for; below it, pairs were skipped or dropped."""
+        with self._lock:
+            floor = self.threshold if self.skipped else 0.0
+            if self.dropped and self._below: floor = max(floor, self._below[0][0])
+            return floor
+
+    def __len__(self):
+        return len(self.above) + len(self._below)
+
+def _insert_index(items, value, key, descending):
+    """Where value goes in items (sorted by key): after every item that ties with it."""
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        if (key(items[middle]) < value) if descending else (value < key(items[middle])): high = middle
+        else: low = middle + 1
+    return low
+
+def _spliced(items, additions):
+    """Copy of items (a list or array) with each (index, item) of additions, by ascending index, inserted
+    before items[index]. The untouched runs are copied as slices, so it is one C-level pass over items."""
+    result, start = items[:0], 0
+    for index, item in additions:
+        result += items[start:index]
+        result.append(item)
+        start = index
+    result += items[start:]
+    return result
+
+class ResultTable:
+    """(score, file1, file2, group, estimated) rows behind the results view.
+
+    All rows are kept sorted by score, best first, so a threshold change is a bisect over
+    the scores. Sorting and filtering only reorder a list of row references (visible), so the
+    view can page through hundreds of thousands of rows without touching any widgets."""
+    def __init__(self):
+        self.rows, self.visible = [], []
+        self._neg_scores = array('f') # -score of each row, ascending, for bisect
+        self.sort_column, self.descending = SCORE, True
+        self.name_filter, self.low, self.high = "", 0.0, 1.0
+        self.threshold, self._cut = 0.0, 0
+
+    def _key(self):
+        column = self.sort_column
+        return lambda row: row[column]
+
+    def _matches(self, row):
+        if not self.low <= row[SCORE] <= self.high: return False
+        return not self.name_filter or self.name_filter in row[FILE1].lower() or self.name_filter in row[FILE2].lower()
+
+    def _unfiltered(self):
+        return not self.name_filter and self.low <= 0.0 and self.high >= 1.0
+
+    def _refresh(self):
+        passing = self.rows[:self._cut]
+        if self.sort_column == SCORE and self._unfiltered():
+            self.visible = passing if self.descending else passing[::-1]
+        else:
+            self.visible = sorted(filter(self._matches, passing), key=self._key(), reverse=self.descending)
+
+    def _index_scores(self):
+        self._neg_scores = array('f', (-row[SCORE] for row in self.rows))
+        self._cut = bisect.bisect_right(self._neg_scores, -self.threshold)
+
+    def set_rows(self, rows):
+        self.rows = sorted(rows, key=lambda row: row[SCORE], reverse=True)
+        self._index_scores()
+        self._refresh()
+
+    def extend(self, rows):
+        """Adds rows while a scan streams them in. Only the new rows are placed (by bisect) into the
+        score order and the current view order; the existing ones are copied over as slices."""
+        rows = sorted(rows, key=lambda row: row[SCORE], reverse=True)
+        if not rows: return
+        places = [bisect.bisect_right(self._neg_scores, -row[SCORE]) for row in rows]
+        self.rows = _spliced(self.rows, zip(places, rows))
+        self._neg_scores = _spliced(self._neg_scores, ((index, -row[SCORE]) for index, row in zip(places, rows)))
+        self._cut = bisect.bisect_right(self._neg_scores, -self.threshold)
+        key = self._key()
+        added = sorted((row for row in rows if row[SCORE] >= self.threshold and self._matches(row)), key=key, reverse=self.descending)
+        self.visible = _spliced(self.visible, [(_insert_index(self.visible, key(row), key, self.descending), row) for row in added])
+
+    def set_threshold(self, threshold):
+        """Shows only rows scoring at least threshold; one bisect plus a slice when unfiltered."""
+        self.threshold = as_stored(threshold)
+        self._cut = bisect.bisect_right(self._neg_scores, -self.threshold)
+        self._refresh()
+
+    def sort(self, column, descending):
+        self.sort_column, self.descending = column, descending
+        self._refresh()
+
+    def set_filter(self, name="", low=0.0, high=1.0):
+        """Keeps rows whose file names contain name (case-insensitive) and whose score is in [low, high]."""
+        self.name_filter, self.low, self.high = name.strip().lower(), as_stored(low), as_stored(high)
+        self._refresh()
+
+    def clear(self):
+        self.rows, self.visible, self._neg_scores, self._cut = [], [], array('f'), 0
+
+    def passing(self):
+        """Number of rows at or above the threshold, before the name and score-range filters."""
+        return self._cut
+
+    def __len__(self):
+        return len(self.visible)
+
+    def __getitem__(self, index):
+        return self.visible[index]
+
+    def __iter__(self):
+        return iter(self.visible)
+
+def write_result_file(path, rows, meta):
+    """Writes (score, file1, file2, group, estimated) rows and the scan's meta dict as a JSON results file."""
+    data = dict(meta, format=RESULTS_FORMAT, version=RESULTS_VERSION,
+                rows=[[as_stored(row[SCORE]), row[FILE1], row[FILE2], row[GROUP], 1 if row[ESTIMATED] else 0] for row in rows])
+    with open(path, "w", encoding="utf-8") as f: json.dump(data, f)
+
+def read_result_file(path):
+    """Returns (meta, rows) of a results file, rows best first. Raises ValueError if it is not one."""
+    with open(path, encoding="utf-8") as f:
+        try: data = json.load(f)
+        except json.JSONDecodeError as e: raise ValueError(f"'{path}' is not a results file: {e}")
+    if not isinstance(data, dict) or data.get("format") != RESULTS_FORMAT: raise ValueError(f"'{path}' is not a results file")
+    if data.get("version") != RESULTS_VERSION: raise ValueError(f"'{path}' has unsupported results version {data.get('version')}")
+    rows = [(as_stored(score), file1, file2, group, bool(estimated)) for score, file1, file2, group, estimated in data.pop("rows")]
+    rows.sort(key=lambda row: row[SCORE], reverse=True)
+    return data, rows
+
+def merge_result_files(paths, top_k=DEFAULT_TOP_K):
+    """Combines the results files of all shards of one scan into (meta, rows), rows best first.
+    Every above-threshold row is kept and the top_k best below it, as in a single scan.
+    Raises ValueError if the files come from different scans or a shard is missing or repeated."""
+    shards = [read_result_file(path) for path in paths]
+    if not shards: raise ValueError("No results files given")
+    first, count = shards[0][0], (shards[0][0].get("shard") or [0, 0])[1]
+    seen = set()
+    for path, (meta, _) in zip(paths, shards):
+        if not meta.get("shard"): raise ValueError(f"'{path}' is not a shard (it already holds a whole scan)")
+        index, total = meta["shard"]
+        if total != count: raise ValueError(f"'{path}' is shard {index}/{total}, expected one of {count}")
+        if index in seen: raise ValueError(f"Shard {index}/{count} was given twice")
+        seen.add(index)
+        for key in MATCHING_KEYS:
+            if meta.get(key) != first.get(key): raise ValueError(f"'{path}' comes from a different scan ({key} differs)")
+    missing = sorted(set(range(1, count + 1)) - seen)
+    if missing: raise ValueError(f"Missing shard(s) {', '.join(f'{index}/{count}' for index in missing)}")
+
+    cut = as_stored(first.get("threshold", 0.0))
+    rows = heapq.merge(*(rows for _, rows in shards), key=lambda row: row[SCORE], reverse=True)
+    above, below = [], []
+    for row in rows:
+        if row[SCORE] >= cut: above.append(row)
+        elif len(below) < top_k: below.append(row)
+        else: break
+    floor = max(meta.get("complete_from", 0.0) for meta, _ in shards)
+    if sum(len(rows) for _, rows in shards) > len(above) + len(below): # Below-threshold rows were dropped
+        floor = max(floor, below[-1][SCORE] if below else cut)
+
+    stats = {key: first["stats"][key] for key in SHARED_COUNTERS if key in first.get("stats", {})}
+    for key in SUMMED_COUNTERS:
+        values = [meta.get("stats", {})[key] for meta, _ in shards if key in meta.get("stats", {})]
+        if values: stats[key] = sum(values)
+    merged = {key: first.get(key) for key in MATCHING_KEYS}
+    merged.update(shard=None, shards=count, complete_from=floor, stats=stats)
+    return merged, above + below
+
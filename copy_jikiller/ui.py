@@ -2,18 +2,27 @@ import tkinter as tk
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from ttkbootstrap.scrolled import ScrolledFrame
+from tkinter import filedialog
 import difflib
+import json
 import os
 import sys
 
-# Pillow library import for image processing
-try:
-    from PIL import Image, ImageTk
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    print("Warning: Pillow library is not installed. Banner image resizing will be disabled.")
-    print("You can install it by running: pip install Pillow")
+# Pillow is only needed for the info window banner, so it is imported when that window first opens
+_pil_modules = None
+
+def _load_pil():
+    """Returns (Image, ImageTk), or None if Pillow is not installed."""
+    global _pil_modules
+    if _pil_modules is None:
+        try:
+            from PIL import Image, ImageTk
+            _pil_modules = (Image, ImageTk)
+        except ImportError:
+            _pil_modules = ()
+            print("Warning: Pillow library is not installed. Banner image resizing will be disabled.")
+            print("You can install it by running: pip install Pillow")
+    return _pil_modules or None
 
 # --- Local Module Imports ---
 # This structure assumes ui.py is inside the 'copy_jikiller' package
@@ -165,7 +174,9 @@ class InfoWindow(BaseToplevel):
 
     def _load_and_resize_banner(self, event_width=None):
         try:
-            if not PIL_AVAILABLE: raise FileNotFoundError
+            pil = _load_pil()
+            if pil is None: raise FileNotFoundError
+            Image, ImageTk = pil
             image_path = resource_path(os.path.join('resource', 'copy_jikiller.png'))
             self.original_image = Image.open(image_path)
             
@@ -231,6 +242,37 @@ class CustomMessagebox(BaseToplevel):
         y = parent.winfo_y() + (parent.winfo_height() - self.winfo_height()) // 2
         self.geometry(f"+{x}+{y}")
 
+class ConfirmDialog(BaseToplevel):
+    """Modal question with two buttons; result is True if the confirm button was pressed."""
+    def __init__(self, parent, texts, message, title_key="dialog_info_title", confirm_key="dialog_ok", cancel_key="dialog_cancel", bootstyle="info"):
+        super().__init__(parent, texts.get(title_key, "Info"))
+        self.result = False
+
+        main_frame = ttk.Frame(self, padding=25)
+        main_frame.pack(expand=YES, fill=BOTH)
+        main_frame.columnconfigure(1, weight=1)
+        ttk.Label(main_frame, text="❓", font="-size 24", bootstyle=bootstyle).grid(row=0, column=0, padx=(0, 15), pady=10, sticky='n')
+        ttk.Label(main_frame, text=message, wraplength=320, justify=LEFT).grid(row=0, column=1, pady=10, sticky='w')
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=1, column=0, columnspan=2, pady=(15, 0))
+        ttk.Button(button_frame, text=texts.get(confirm_key, "OK"), command=self._on_confirm, bootstyle=bootstyle, width=12).pack(side=LEFT, padx=5)
+        ttk.Button(button_frame, text=texts.get(cancel_key, "Cancel"), command=self.destroy, bootstyle="outline", width=12).pack(side=LEFT, padx=5)
+
+        self.after(10, self._center_window)
+        self.resizable(False, False)
+
+    def _on_confirm(self):
+        self.result = True
+        self.destroy()
+
+    def _center_window(self):
+        self.update_idletasks()
+        parent = self.master
+        x = parent.winfo_x() + (parent.winfo_width() - self.winfo_width()) // 2
+        y = parent.winfo_y() + (parent.winfo_height() - self.winfo_height()) // 2
+        self.geometry(f"+{x}+{y}")
+
 class AddExtensionDialog(BaseToplevel):
     def __init__(self, parent, texts):
         super().__init__(parent, texts.get("dialog_add_ext_title", "Add Extension"))
@@ -324,3 +366,171 @@ class ManageExtensionsDialog(BaseToplevel):
         x = parent.winfo_x() + (parent.winfo_width() - self.winfo_width()) // 2
         y = parent.winfo_y() + (parent.winfo_height() - self.winfo_height()) // 2
         self.geometry(f"+{x}+{y}")
+
+class ScanStatsWindow(BaseToplevel):
+    """Shows the instrumentation of the last scan (stage timings, counters, slowest files and
+    pairs) as read-only text, with buttons to save it as JSON and to save the cProfile stats."""
+    COUNTERS = ("files", "input_chars", "cache_hits", "cache_misses", "raw_duplicates", "parse_fallbacks", "pairs_total",
+                "pairs_pruned", "prefilter_length", "prefilter_histogram", "pairs_reused", "pairs_scored", "duplicate_pairs",
+                "oversized_files", "pairs_estimated")
+
+    def __init__(self, parent, texts, report, profiler=None):
+        super().__init__(parent, texts.get("stats_title", "Scan Details"))
+        self.geometry("760x600")
+        self.texts, self.report, self.profiler = texts, report, profiler
+
+        main_frame = ttk.Frame(self, padding=15)
+        main_frame.pack(fill=BOTH, expand=YES)
+        main_frame.rowconfigure(0, weight=1); main_frame.columnconfigure(0, weight=1)
+        text = tk.Text(main_frame, wrap=NONE, font=("Courier", 10), relief=FLAT)
+        scrollbar = ttk.Scrollbar(main_frame, orient=VERTICAL, command=text.yview)
+        text.configure(yscrollcommand=scrollbar.set)
+        text.grid(row=0, column=0, sticky="nsew"); scrollbar.grid(row=0, column=1, sticky="ns")
+        text.insert("1.0", self._format())
+        text.config(state=DISABLED)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(button_frame, text=texts.get("stats_save_json", "Save as JSON..."), command=self._save_json).pack(side=LEFT, padx=5)
+        profile_button = ttk.Button(button_frame, text=texts.get("stats_save_profile", "Save Profile..."), command=self._save_profile, bootstyle="info")
+        profile_button.pack(side=LEFT, padx=5)
+        if profiler is None: profile_button.config(state=DISABLED)
+        ttk.Button(button_frame, text=texts.get("dialog_ok", "OK"), command=self.destroy, bootstyle="outline").pack(side=LEFT, padx=5)
+
+    def _format(self):
+        report, texts, lines = self.report, self.texts, []
+        lines.append(f"{texts.get('stats_stages', 'Stage timings')}  [{report.get('mode', '')} / {report.get('scorer', '')}]")
+        for stage, seconds in report.get("stage_seconds", {}).items():
+            lines.append(f"  {stage:<22}{seconds:>12.3f}")
+        for key in ("read_wait_seconds", "compare_seconds"):
+            if key in report: lines.append(f"  {key:<22}{report[key]:>12.3f}")
+        for step, seconds in report.get("timing_totals", {}).items():
+            lines.append(f"  {'normalize/' + step:<22}{seconds:>12.3f}")
+        lines.append("")
+        lines.append(texts.get("stats_counters", "Counters"))
+        for key in self.COUNTERS:
+            if key in report: lines.append(f"  {key:<22}{report[key]:>12,}")
+        for title_key, key in (("stats_slowest_files", "slowest_files"), ("stats_slowest_pairs", "slowest_pairs")):
+            if not report.get(key): continue
+            lines.append("")
+            lines.append(texts.get(title_key, key))
+            for entry in report[key]:
+                if key == "slowest_files":
+                    name, seconds, steps = entry
+                    detail = ", ".join(f"{step} {value * 1000:.1f}" for step, value in steps.items())
+                    lines.append(f"  {seconds * 1000:>10.1f} ms  {name}  ({detail} ms)")
+                else:
+                    *names, seconds = entry
+                    lines.append(f"  {seconds * 1000:>10.1f} ms  {'  ↔  '.join(names)}")
+        if self.profiler is None:
+            lines.append("")
+            lines.append(texts.get("stats_profile_hint", ""))
+        return "\n".join(lines)
+
+    def _save_json(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path: return
+        try:
+            with open(path, "w", encoding="utf-8") as f: json.dump(self.report, f, indent=2)
+        except OSError as e:
+            CustomMessagebox(self, self.texts, self.texts["dialog_export_error"].format(error=e), title_key="dialog_error_title", bootstyle="error")
+
+    def _save_profile(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".prof", filetypes=[("cProfile", "*.prof")])
+        if not path: return
+        try:
+            self.profiler.dump_stats(path)
+        except OSError as e:
+            CustomMessagebox(self, self.texts, self.texts["dialog_export_error"].format(error=e), title_key="dialog_error_title", bootstyle="error")
+
+class VirtualTreeview(ttk.Frame):
+    """A Treeview that only owns as many items as fit on screen and rewrites their values
+    while scrolling, so a table of any length renders, sorts and filters instantly.
+
+    table needs __len__ and __getitem__ plus sort(key, descending); columns is a list of
+    (column id, sort key, sort descending first)."""
+    def __init__(self, parent, table, columns, format_row, height=15, **kwargs):
+        super().__init__(parent)
+        self.table, self.format_row, self.offset = table, format_row, 0
+        self.sort_keys = {column: (key, descending) for column, key, descending in columns}
+        self.heading_texts, self.slots = {}, []
+        self.rowconfigure(0, weight=1); self.columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(self, columns=[column for column, _, _ in columns], show='headings', height=height, selectmode="browse", **kwargs)
+        self.scrollbar = ttk.Scrollbar(self, orient=VERTICAL, command=self._on_scrollbar, bootstyle="secondary-round")
+        self.tree.grid(row=0, column=0, sticky="nsew"); self.scrollbar.grid(row=0, column=1, sticky="ns")
+        for column in self.sort_keys:
+            self.tree.heading(column, command=lambda c=column: self.sort_by(c))
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3)); self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-len(self.slots))); self.tree.bind("<Next>", lambda e: self.scroll(len(self.slots)))
+        self._set_slot_count(height)
+
+    def _set_slot_count(self, count):
+        count = max(1, count)
+        while len(self.slots) < count: self.slots.append(self.tree.insert("", END, values=()))
+        while len(self.slots) > count: self.tree.delete(self.slots.pop())
+        self.refresh()
+
+    def _on_resize(self, event):
+        # Measure the real heading and row height from the first item once it is laid out
+        bbox = self.tree.bbox(self.slots[0]) if self.slots else ""
+        if not bbox: return
+        _, top, _, row_height = bbox
+        self._set_slot_count((event.height - top) // max(1, row_height))
+
+    def _on_mouse_wheel(self, event):
+        if sys.platform == "darwin": delta = -event.delta
+        else: delta = int(-1*(event.delta/120)) * 3
+        self.scroll(delta)
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll(int(float(amount) * len(self.table)) - self.offset)
+        else:
+            self.scroll(int(amount) * (len(self.slots) if unit == "pages" else 1))
+
+    def scroll(self, rows):
+        self.offset += rows
+        self.tree.selection_remove(self.tree.selection())
+        self.refresh()
+        return "break"
+
+    def refresh(self):
+        """Re-reads the visible window of the table into the fixed set of items."""
+        total, count = len(self.table), len(self.slots)
+        self.offset = max(0, min(self.offset, total - count))
+        for n, item_id in enumerate(self.slots):
+            index = self.offset + n
+            self.tree.item(item_id, values=self.format_row(self.table[index]) if index < total else ())
+        self.scrollbar.set(*((self.offset / total, min(1.0, (self.offset + count) / total)) if total else (0.0, 1.0)))
+
+    def reset(self):
+        self.scroll(-self.offset)
+
+    def row_at(self, y):
+        """Returns the table row under the given y coordinate, or None."""
+        item_id = self.tree.identify_row(y)
+        if not item_id: return None
+        index = self.offset + self.slots.index(item_id)
+        return self.table[index] if index < len(self.table) else None
+
+    def set_heading(self, column, text):
+        self.heading_texts[column] = text
+        self._update_headings()
+
+    def sort_by(self, column):
+        key, descending = self.sort_keys[column]
+        if self.table.sort_column == key: descending = not self.table.descending
+        self.table.sort(key, descending)
+        self._update_headings()
+        self.reset()
+
+    def _update_headings(self):
+        for column, text in self.heading_texts.items():
+            key, _ = self.sort_keys[column]
+            arrow = (" ▼" if self.table.descending else " ▲") if self.table.sort_column == key else ""
+            self.tree.heading(column, text=text + arrow)
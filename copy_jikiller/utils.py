@@ -1,6 +1,7 @@
 import sys
 import os
 import json
+import time
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -65,7 +66,15 @@ def load_settings():
     default_settings = {
         "language": "EN", 
         "theme": "superhero", 
-        "extensions": {".py": True, ".c": True, ".cpp": True, ".java": True, ".*": True}
+        "extensions": {".py": True, ".c": True, ".cpp": True, ".java": True, ".*": True},
+        "workers": 0,
+        "cache_max_mb": 256,
+        "gst_min_match": 8,
+        "top_k": 5000,
+        "profile_scans": False,
+        "max_file_kb": 1024,
+        "pair_time_budget": 30,
+        "checkpoint_seconds": 60
     }
     try:
         with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
@@ -76,6 +85,26 @@ def load_settings():
             # --- Defensive coding for theme ---
             if settings.get("theme") not in ["superhero", "litera"]:
                 settings["theme"] = default_settings["theme"]
+            # --- Defensive coding for worker count (0 = use all cores) ---
+            if not isinstance(settings.get("workers"), int) or settings["workers"] < 0:
+                settings["workers"] = default_settings["workers"]
+            # --- Defensive coding for the normalization cache size limit ---
+            if not isinstance(settings.get("cache_max_mb"), int) or settings["cache_max_mb"] <= 0:
+                settings["cache_max_mb"] = default_settings["cache_max_mb"]
+            # --- Defensive coding for the Greedy String Tiling minimum match length ---
+            if not isinstance(settings.get("gst_min_match"), int) or settings["gst_min_match"] < 1:
+                settings["gst_min_match"] = default_settings["gst_min_match"]
+            # --- Defensive coding for the number of below-threshold pairs kept for context ---
+            if not isinstance(settings.get("top_k"), int) or settings["top_k"] < 0:
+                settings["top_k"] = default_settings["top_k"]
+            # --- Defensive coding for the cProfile switch (scan details dialog) ---
+            if not isinstance(settings.get("profile_scans"), bool):
+                settings["profile_scans"] = default_settings["profile_scans"]
+            # --- Defensive coding for the per-file size cap and per-pair time budget (0 = unlimited) ---
+            # --- and for the interval between scan checkpoints (0 = only when a scan is stopped) ---
+            for key in ("max_file_kb", "pair_time_budget", "checkpoint_seconds"):
+                if not isinstance(settings.get(key), (int, float)) or isinstance(settings[key], bool) or settings[key] < 0:
+                    settings[key] = default_settings[key]
             return settings
     except (FileNotFoundError, json.JSONDecodeError):
         return default_settings
@@ -108,3 +137,80 @@ def configure_clang(clang_module):
         else:
             return False
     return clang_module is not None and clang_module.cindex.Config.loaded
+
+# --- Startup Profiling (--import-profile) ---
+class _TimedLoader:
+    """Wraps a module loader and records how long executing the module takes."""
+    def __init__(self, loader, name, profiler):
+        self._loader, self._name, self._profiler = loader, name, profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        module.__loader__ = self._loader
+        self._profiler._enter()
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._leave(self._name, time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+class ImportProfiler:
+    """Meta path hook that times every module import while installed.
+
+    Records, per module, the total time including its own imports and the self time
+    excluding them, plus named stages marked by the caller; report() formats both."""
+    def __init__(self):
+        self.modules, self.stages = {}, []
+        self._children, self._finding = [], set()
+        self._started = self._last = time.perf_counter()
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path: sys.meta_path.remove(self)
+
+    def find_spec(self, name, path=None, target=None):
+        if name in self._finding: return None
+        self._finding.add(name)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"): continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None: break
+            else:
+                return None
+        finally:
+            self._finding.discard(name)
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, name, self)
+        return spec
+
+    def _enter(self):
+        self._children.append(0.0)
+
+    def _leave(self, name, elapsed):
+        nested = self._children.pop()
+        if self._children: self._children[-1] += elapsed
+        self.modules[name] = (elapsed, elapsed - nested)
+
+    def mark(self, stage):
+        """Records the time since the previous mark (or creation) under the given stage name."""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def report(self, top=25):
+        lines = ["Startup profile", "Stages:"]
+        lines += [f"  {seconds * 1000:8.1f} ms  {stage}" for stage, seconds in self.stages]
+        lines.append(f"  {(self._last - self._started) * 1000:8.1f} ms  total")
+        lines.append(f"Slowest imports (total / self, of {len(self.modules)} modules):")
+        ranked = sorted(self.modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        lines += [f"  {total * 1000:8.1f} ms {own * 1000:8.1f} ms  {name}" for name, (total, own) in ranked]
+        return "\n".join(lines)
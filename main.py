@@ -1,14 +1,45 @@
-import ttkbootstrap as ttk
-from copy_jikiller.app import PlagiarismCheckerApp
-from copy_jikiller.utils import load_settings
 import sys
+import multiprocessing
+
+IMPORT_PROFILE_FILE = "import_profile.txt"
+
+def _write_import_profile(profiler):
+    profiler.mark("first frame")
+    profiler.uninstall()
+    report = profiler.report()
+    # Windowed (frozen) builds have no console; fall back to a file next to the settings
+    if sys.stderr is not None:
+        print(report, file=sys.stderr)
+    else:
+        with open(IMPORT_PROFILE_FILE, "w", encoding="utf-8") as f: f.write(report + "\n")
+
+def main():
+    profiler = None
+    if "--import-profile" in sys.argv:
+        from copy_jikiller.utils import ImportProfiler
+        profiler = ImportProfiler().install()
+
+    # GUI modules are imported here rather than at module level, so process-pool workers
+    # (which re-import this file when processes are spawned) never load Tk
+    import ttkbootstrap as ttk
+    from copy_jikiller.app import PlagiarismCheckerApp
+    from copy_jikiller.utils import load_settings
+    if profiler: profiler.mark("imports")
 
-if __name__ == "__main__":
     # Load settings to determine the initial theme
     settings = load_settings()
     initial_theme = settings.get("theme", "superhero")
-    
+
     # Create the main window with the correct initial theme
     root = ttk.Window(themename=initial_theme)
+    if profiler: profiler.mark("main window")
     app = PlagiarismCheckerApp(root)
-    root.mainloop()
\ No newline at end of file
+    if profiler:
+        profiler.mark("application setup")
+        root.after_idle(_write_import_profile, profiler)
+    root.mainloop()
+
+if __name__ == "__main__":
+    # Required for the scan engine's process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+    main()
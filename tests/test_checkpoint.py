@@ -0,0 +1,85 @@
+import signal
+import threading
+from array import array
+
+from benchmarks.corpus import generate_corpus
+from copy_jikiller import logic
+from copy_jikiller.cache import PairScoreCache
+from copy_jikiller.logic import ScanEngine, ScanProgress
+
+class StopAfter(ScanProgress):
+    """Sets the scan's stop event once `pairs` pairs were reported as scored."""
+    def __init__(self, stop_event, pairs):
+        super().__init__()
+        self.stop_event, self.pairs = stop_event, pairs
+    def advance(self, count=1):
+        super().advance(count)
+        if self.current >= self.pairs: self.stop_event.set()
+
+class CountdownEvent:
+    """Stand-in for the workers' cancel event that reports set after `calls` checks."""
+    def __init__(self, calls):
+        self.calls = calls
+    def is_set(self):
+        self.calls -= 1
+        return self.calls < 0
+
+def _engine(tmp_path, folder="corpus", **options):
+    return ScanEngine("text", threshold=0.0, score_cache=PairScoreCache(str(tmp_path / "cache.sqlite3")),
+                      scope=str(tmp_path / folder), **options)
+
+def _scores(results):
+    return sorted((row[1], row[2], row[0]) for row in results.ranked(include_below=True))
+
+def test_cancelled_chunk_returns_the_pairs_already_scored(monkeypatch):
+    monkeypatch.setattr(signal, "signal", lambda *args: None)  # Keep Ctrl-C working for pytest itself
+    tokens = array('i', range(200))
+    # Scoring one of these pairs checks the event a handful of times, so the cancel lands in the second
+    logic._init_compare_worker([tokens] * 4, "sequence", logic.DEFAULT_MIN_MATCH, 0.0, CountdownEvent(10))
+    scores, estimated, seconds, slowest = logic._compare_chunk([(0, 1), (0, 2), (0, 3), (1, 2), (1, 3)])
+    assert 0 < len(scores) < 5
+    assert all(similarity == 1.0 for _, _, similarity in scores) and not estimated
+
+def test_stopped_scan_checkpoints_partial_work_and_resumes(tmp_path):
+    files, _ = generate_corpus(30, "text", seed=4)
+    expected = _scores(_engine(tmp_path, "reference", workers=1).run(files))
+
+    stop_event = threading.Event()
+    engine = _engine(tmp_path, workers=1, stop_event=stop_event, progress=StopAfter(stop_event, 70))
+    assert engine.run(files) is None
+    saved = engine.score_cache.checkpoint(engine.checkpoint_key())
+    assert saved is not None and saved["pairs_done"] >= 70
+
+    resumed = _engine(tmp_path, workers=1)
+    assert _scores(resumed.run(files)) == expected
+    assert resumed.stats["resumed"] and resumed.stats["pairs_reused"] >= 70
+    assert resumed.score_cache.checkpoint(resumed.checkpoint_key()) is None
+
+def test_stopped_pool_scan_keeps_in_flight_chunks(tmp_path):
+    files, _ = generate_corpus(40, "text", seed=5)
+    stop_event = threading.Event()
+    engine = _engine(tmp_path, workers=2, stop_event=stop_event, progress=StopAfter(stop_event, 1))
+    assert engine.run(files) is None
+    saved = engine.score_cache.checkpoint(engine.checkpoint_key())
+    # The chunk that triggered the stop plus whatever the other in-flight chunks had scored
+    assert saved["pairs_done"] > logic.compare_chunk_size(40 * 39 // 2, 2)
+
+def test_checkpoint_under_other_settings_is_not_a_resume(tmp_path):
+    files, _ = generate_corpus(20, "text", seed=6)
+    stop_event = threading.Event()
+    _engine(tmp_path, workers=1, stop_event=stop_event, progress=StopAfter(stop_event, 50)).run(files)
+    changed = _engine(tmp_path, workers=1, min_match=logic.DEFAULT_MIN_MATCH + 4)
+    saved = changed.score_cache.checkpoint(changed.checkpoint_key())
+    assert saved is not None and saved["scope"] != changed.score_scope()
+    changed.run(files)
+    assert not changed.stats.get("resumed") and changed.stats["pairs_reused"] == 0
+
+def test_starting_over_keeps_the_cached_scores(tmp_path):
+    files, _ = generate_corpus(20, "text", seed=7)
+    stop_event = threading.Event()
+    stopped = _engine(tmp_path, workers=1, stop_event=stop_event, progress=StopAfter(stop_event, 50))
+    stopped.run(files)
+    stopped.score_cache.clear_checkpoint(stopped.checkpoint_key()) # "Start Over" in the resume dialog
+    fresh = _engine(tmp_path, workers=1)
+    fresh.run(files)
+    assert not fresh.stats.get("resumed") and fresh.stats["pairs_reused"] >= 50
@@ -0,0 +1,21 @@
+from copy_jikiller import cli
+
+BASE = "".join(f"line {i} computes value {i * 7} from the input and stores it\n" for i in range(60))
+
+def _folder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "submissions"
+    folder.mkdir()
+    (folder / "a.txt").write_text(BASE)
+    (folder / "b.txt").write_text(BASE[:len(BASE) * 3 // 4] + "different ending " * 40)
+    return folder
+
+def _scan(folder, *options):
+    return cli.main(["scan", str(folder), "--ext", ".txt", "--no-cache", "--workers", "1", "--out", str(folder.parent / "out.csv"), *options])
+
+def test_fail_above_below_threshold_triggers(tmp_path, monkeypatch):
+    folder = _folder(tmp_path, monkeypatch)
+    assert _scan(folder, "--threshold", "95") == cli.EXIT_CLEAN
+    assert _scan(folder, "--threshold", "95", "--fail-above", "50") == cli.EXIT_FLAGGED
+    # The CSV still lists only the pairs at or above --threshold
+    assert (tmp_path / "out.csv").read_text(encoding="utf-8-sig").strip().count("\n") == 0
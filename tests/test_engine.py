@@ -0,0 +1,85 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from benchmarks.corpus import generate_corpus
+from copy_jikiller import logic
+from copy_jikiller.fingerprint import candidate_pairs
+from copy_jikiller.logic import ScanEngine, build_artifact, compare_chunk_size, CHUNKS_PER_WORKER, DEFAULT_CHUNK_SIZE, STREAM_CHUNK_SIZE, NORMALIZE_BATCH_SIZE, scan_report, backend_available
+
+def _scan(files, mode="text", **options):
+    engine = ScanEngine(mode, workers=1, **options)
+    return engine, engine.run(files)
+
+def test_threshold_zero_scores_every_pair():
+    files, _ = generate_corpus(20, "python", seed=7)
+    engine, results = _scan(files, threshold=0.0)
+    assert engine.stats["candidates"] == "all"
+    assert engine.stats["pairs_pruned"] == 0
+    assert len(results.ranked(include_below=True)) == engine.stats["pairs_total"] == 20 * 19 // 2
+    assert results.complete_from() == 0.0
+
+def test_pruned_pairs_raise_the_completeness_floor():
+    files, _ = generate_corpus(20, "python", seed=7)
+    engine, results = _scan(files, threshold=0.5)
+    assert engine.stats["candidates"] == "index" and results.skipped > 0
+    assert results.complete_from() >= 0.5
+
+def test_compare_chunks_keep_every_worker_busy():
+    assert -(-4753 // compare_chunk_size(4753, 16)) >= 16
+    assert -(-7021 // compare_chunk_size(7021, 2)) >= 2 * CHUNKS_PER_WORKER
+    assert compare_chunk_size(10 ** 7, 16) == DEFAULT_CHUNK_SIZE
+    assert compare_chunk_size(30, 16) == STREAM_CHUNK_SIZE
+    assert compare_chunk_size(10 ** 6, 4, largest=10) == 10
+
+def test_worker_pools_match_the_in_process_scan():
+    files, _ = generate_corpus(20, "python", seed=8)
+    _, single = _scan(files, "python", threshold=0.0)
+    engine = ScanEngine("python", workers=2, threshold=0.0)
+    pooled = engine.run(files)
+    assert pooled.ranked(include_below=True) == single.ranked(include_below=True)
+
+class RecordingPool:
+    """Stands in for ProcessPoolExecutor: records that a pool was created and runs tasks in-process."""
+    created = []
+    def __init__(self, max_workers, **options):
+        RecordingPool.created.append(max_workers)
+    def submit(self, function, *args):
+        future = Future()
+        future.set_result(function(*args))
+        return future
+    def shutdown(self, **options):
+        pass
+
+def test_normalize_uses_the_pool_with_more_workers_than_a_batch_holds(monkeypatch):
+    monkeypatch.setattr(logic, "ProcessPoolExecutor", RecordingPool)
+    files, _ = generate_corpus(2 * NORMALIZE_BATCH_SIZE, "text", seed=3)
+    for workers in (16, 33, 64):
+        RecordingPool.created.clear()
+        names, _, built, _ = ScanEngine("text", workers=workers).normalize(files.items())
+        assert RecordingPool.created == [workers] and len(built) == len(files)
+
+def test_scan_report_keeps_the_step_timings_of_the_slowest_files():
+    files, _ = generate_corpus(12, "python", seed=2)
+    engine, _ = _scan(files, "python")
+    report = json.loads(json.dumps(scan_report(engine.stats)))
+    assert "file_timings" not in report and report["slowest_files"]
+    for name, seconds, steps in report["slowest_files"]:
+        assert name in files and {"normalize", "fingerprint"} <= set(steps)
+        assert seconds == pytest.approx(steps["normalize"] + steps["fingerprint"])
+
+@pytest.mark.skipif(not backend_available("c"), reason="libclang is not installed")
+def test_slowest_c_files_show_the_clang_parse_split():
+    files, _ = generate_corpus(6, "c", seed=2)
+    engine, _ = _scan(files, "c")
+    assert all({"parse", "tokens"} <= set(steps) for _, _, steps in scan_report(engine.stats)["slowest_files"])
+
+@pytest.mark.parametrize("mode", ["python", "java", "text"])
+def test_fingerprint_index_prunes_the_benchmark_corpus(mode):
+    files, planted = generate_corpus(200, mode, seed=7)
+    names = sorted(files)
+    pairs = set(candidate_pairs([build_artifact(files[name], mode)[1] for name in names]))
+    assert len(pairs) < 200 * 199 // 4 # Category tokens once made every file share a fingerprint with every other
+    position = {name: index for index, name in enumerate(names)}
+    assert all(tuple(sorted((position[pair.original], position[pair.variant]))) in pairs for pair in planted)
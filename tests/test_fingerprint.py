@@ -0,0 +1,24 @@
+import random
+from array import array
+
+from copy_jikiller.fingerprint import kgram_counts, estimate_similarity
+from copy_jikiller.logic import score_pair
+
+def _random_tokens(rng, count, values):
+    return array('i', (rng.randrange(values) for _ in range(count)))
+
+def test_estimate_of_unrelated_few_token_streams_stays_low():
+    rng = random.Random(11)
+    tokens1, tokens2 = _random_tokens(rng, 20000, 4), _random_tokens(rng, 20000, 4)
+    # A 1 ns budget forces the estimate; a plain k-gram set over 4 values saturated at 1.0 here
+    similarity, estimated = score_pair(tokens1, tokens2, "sequence", seconds=1e-9)
+    assert estimated and similarity < 0.5
+
+def test_estimate_counts_repeated_kgrams():
+    block = list(range(20))
+    once, repeated = array('i', block), array('i', block * 10)
+    assert estimate_similarity(kgram_counts(once), kgram_counts(once)) == 1.0
+    assert estimate_similarity(kgram_counts(once), kgram_counts(repeated)) < 0.25
+
+def test_estimate_of_empty_streams_is_zero():
+    assert estimate_similarity(kgram_counts(array('i')), kgram_counts(array('i'))) == 0.0
@@ -0,0 +1,81 @@
+import time
+import random
+import threading
+from array import array
+
+import pytest
+
+from copy_jikiller.logic import greedy_string_tiling, normalize_content, TokenVocabulary, compare_normalized, score_pair, ScanCancelled
+
+def _ids(values):
+    return array('i', values)
+
+def test_identical_sequences_score_one():
+    tokens = _ids(range(40))
+    similarity, tiles = greedy_string_tiling(tokens, tokens, min_match=8)
+    assert similarity == 1.0
+    assert tiles == [(0, 0, 40)]
+
+def test_empty_sequences_score_one():
+    assert greedy_string_tiling(_ids([]), _ids([]))[0] == 1.0
+
+def test_swapped_blocks_score_one():
+    first, second = list(range(20)), list(range(100, 130))
+    similarity, tiles = greedy_string_tiling(_ids(first + second), _ids(second + first), min_match=8)
+    assert similarity == 1.0
+    assert sorted(length for _, _, length in tiles) == [20, 30]
+
+def test_matches_shorter_than_min_match_are_ignored():
+    tokens1, tokens2 = _ids([1, 2, 3, 4, 50, 51, 52, 53, 54]), _ids([1, 2, 3, 4, 60, 61, 62])
+    assert greedy_string_tiling(tokens1, tokens2, min_match=5) == (0.0, [])
+    assert greedy_string_tiling(tokens1, tokens2, min_match=4) == (0.5, [(0, 0, 4)])
+
+def test_tiles_respect_min_match_and_do_not_overlap():
+    rng = random.Random(3)
+    for min_match in (2, 4, 8):
+        for _ in range(20):
+            tokens1 = _ids(rng.randrange(6) for _ in range(rng.randrange(1, 120)))
+            tokens2 = _ids(rng.randrange(6) for _ in range(rng.randrange(1, 120)))
+            similarity, tiles = greedy_string_tiling(tokens1, tokens2, min_match)
+            covered1, covered2 = set(), set()
+            for i, j, length in tiles:
+                assert length >= min_match
+                assert tokens1[i:i + length] == tokens2[j:j + length]
+                span1, span2 = set(range(i, i + length)), set(range(j, j + length))
+                assert not covered1 & span1 and not covered2 & span2
+                covered1 |= span1; covered2 |= span2
+            assert similarity == 2.0 * len(covered1) / (len(tokens1) + len(tokens2))
+
+def test_reordered_python_functions_score_one():
+    source = ("def area(width, height):\n    result = width * height\n    return result\n\n"
+              "def perimeter(width, height):\n    total = 2 * (width + height)\n    return total\n")
+    first, second = source.split("\n\n")
+    vocabulary = TokenVocabulary()
+    tokens1, tokens2 = (vocabulary.encode(normalize_content(content, "python")) for content in (source, second + "\n\n" + first))
+    assert compare_normalized(tokens1, tokens2, "gst", min_match=4) == 1.0
+
+def _data_table_pair():
+    """A Python file holding a large zero-filled table against a near-copy: a few distinct tokens, repeated."""
+    source = "TABLE = [" + "0, " * 6000 + "]\n\ndef lookup(index):\n    return TABLE[index]\n"
+    vocabulary = TokenVocabulary()
+    return [vocabulary.encode(normalize_content(content, "python")) for content in (source, source.replace("0, 0", "0, 1", 1))]
+
+def test_budget_stops_a_repetitive_pair():
+    tokens1, tokens2 = _data_table_pair()
+    started = time.perf_counter()
+    similarity, estimated = score_pair(tokens1, tokens2, "gst", seconds=0.2)
+    assert estimated and time.perf_counter() - started < 1.0
+
+def test_stop_event_cancels_a_repetitive_pair():
+    tokens1, tokens2 = _data_table_pair()
+    stop_event = threading.Event()
+    threading.Timer(0.1, stop_event.set).start()
+    started = time.perf_counter()
+    with pytest.raises(ScanCancelled): score_pair(tokens1, tokens2, "gst", stop_event=stop_event)
+    assert time.perf_counter() - started < 1.0
+
+def test_low_entropy_streams_tile_in_near_linear_time():
+    tokens = _ids([1, 2] * 8000)
+    started = time.perf_counter()
+    assert greedy_string_tiling(tokens, tokens) == (1.0, [(0, 0, 16000)])
+    assert time.perf_counter() - started < 5.0 # Quadratic extension took minutes here
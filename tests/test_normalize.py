@@ -0,0 +1,38 @@
+from copy_jikiller.logic import normalize_content, TokenVocabulary, compare_normalized, IDENTIFIER_TOKEN
+
+SOURCE = """def total(values, limit):
+    result = 0
+    for index in range(limit):
+        result = result + values[index] * 2
+        if result > 100:
+            result = result - limit
+    return result
+
+def scale(items, factor):
+    scaled = []
+    for item in items:
+        scaled.append(item * factor)
+    return scaled
+"""
+
+def _score(first, second, mode="python", scorer="sequence"):
+    vocabulary = TokenVocabulary()
+    tokens1, tokens2 = (vocabulary.encode(normalize_content(content, mode)) for content in (first, second))
+    return compare_normalized(tokens1, tokens2, scorer)
+
+def test_identifiers_collapse_to_categories():
+    tokens = normalize_content("def f(a):\n    b = a\n    return b\n", "python")
+    assert {"FUNC", "ARG", "VAR"} <= set(tokens)
+    assert not any(token.startswith(("VAR_", "FUNC_", "ARG_", "ID_")) for token in tokens)
+
+def test_renamed_identifiers_score_as_identical():
+    renamed = SOURCE.replace("total", "summe").replace("result", "acc").replace("values", "data").replace("scaled", "out")
+    assert _score(SOURCE, renamed) == 1.0
+
+def test_prepended_identifier_does_not_shift_later_names():
+    # With per-file numbering (VAR_0, VAR_1, ...) one new name at the top renamed every later one
+    for scorer in ("sequence", "gst"):
+        assert _score(SOURCE, "unused_flag = 0\n" + SOURCE, scorer=scorer) > 0.95
+
+def test_text_mode_keeps_identifiers():
+    assert IDENTIFIER_TOKEN not in normalize_content("alpha = beta + 1", "text")
@@ -0,0 +1,35 @@
+import random
+from array import array
+
+import pytest
+
+from copy_jikiller import logic
+from copy_jikiller.logic import prefilter_pairs, compare_normalized
+
+def _random_artifacts(rng, count):
+    """Token streams with a shared prefix or a shuffled copy now and then, so that scores spread out."""
+    artifacts = []
+    for _ in range(count):
+        values, length = rng.choice((3, 8, 40)), rng.randrange(0, 160)
+        tokens = [rng.randrange(values) for _ in range(length)]
+        if artifacts and rng.random() < 0.4:
+            source = list(rng.choice(artifacts))
+            tokens = source[:rng.randrange(len(source) + 1)] + tokens[:rng.randrange(40)]
+            if rng.random() < 0.5: rng.shuffle(tokens)
+        artifacts.append(array('i', tokens))
+    return artifacts
+
+@pytest.mark.parametrize("numpy", [False, True])
+def test_prefilter_never_drops_a_pair_at_its_own_score(numpy, monkeypatch):
+    if numpy and not logic.NUMPY_AVAILABLE: pytest.skip("NumPy is not installed")
+    monkeypatch.setattr(logic, "NUMPY_AVAILABLE", numpy)
+    rng = random.Random(5)
+    for _ in range(5):
+        artifacts = _random_artifacts(rng, 24)
+        pairs = [(i, j) for i in range(len(artifacts)) for j in range(i + 1, len(artifacts))]
+        for scorer in ("sequence", "gst"):
+            for i, j in pairs:
+                score = compare_normalized(artifacts[i], artifacts[j], scorer, min_match=4)
+                if score <= 0: continue
+                # Both bounds must be >= the real score, so a threshold of exactly that score keeps the pair
+                assert prefilter_pairs(artifacts, [(i, j)], score)[0] == [(i, j)], (scorer, i, j, score)
@@ -0,0 +1,38 @@
+import random
+
+from copy_jikiller.results import ResultTable, SCORE, FILE1, GROUP, as_stored
+
+def _rows(rng, count):
+    return [(as_stored(rng.choice((0.25, 0.5, 0.75, 1.0)) if rng.random() < 0.3 else as_stored(rng.random())),
+             f"file{rng.randrange(30)}", f"file{rng.randrange(30)}", rng.randrange(3), rng.random() < 0.1) for _ in range(count)]
+
+def _views(**settings):
+    threshold, column, descending, name = settings["threshold"], settings["column"], settings["descending"], settings["name"]
+    streamed, loaded = ResultTable(), ResultTable()
+    for table in (streamed, loaded):
+        table.set_threshold(threshold); table.sort(column, descending); table.set_filter(name, 0.1, 0.9 if name else 1.0)
+    return streamed, loaded
+
+def test_streamed_rows_match_loading_them_at_once():
+    rng = random.Random(2)
+    for column in (SCORE, FILE1, GROUP):
+        for descending in (True, False):
+            for name in ("", "file1"):
+                streamed, loaded = _views(threshold=0.3, column=column, descending=descending, name=name)
+                rows = []
+                for _ in range(12):
+                    batch = _rows(rng, rng.randrange(0, 40))
+                    streamed.extend(batch); rows += batch
+                loaded.set_rows(rows); loaded.set_threshold(0.3)
+                # Score ties keep the order the rows came in, as a stable sort over all of them does
+                assert streamed.rows == loaded.rows
+                assert sorted(streamed) == sorted(loaded)
+                assert [row[column] for row in streamed] == [row[column] for row in loaded]
+                assert streamed.passing() == loaded.passing()
+
+def test_threshold_after_streaming_uses_the_merged_scores():
+    table = ResultTable()
+    table.extend([(as_stored(0.9), "a", "b", 0, False), (as_stored(0.2), "a", "c", 0, False)])
+    table.extend([(as_stored(0.5), "b", "c", 0, False)])
+    table.set_threshold(0.4)
+    assert [row[SCORE] for row in table] == [as_stored(0.9), as_stored(0.5)]
@@ -0,0 +1,72 @@
+import json
+import itertools
+
+import pytest
+
+from benchmarks.corpus import generate_corpus
+from copy_jikiller import cli
+from copy_jikiller.logic import ScanEngine, shard_of, content_hash
+from copy_jikiller.results import merge_result_files, read_result_file
+
+def _folder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "submissions"
+    folder.mkdir()
+    files, _ = generate_corpus(24, "text", seed=9)
+    for name, content in files.items(): (folder / name).write_text(content)
+    (folder / "copy_of_first.txt").write_text(files[min(files)]) # An exact duplicate group
+    return folder
+
+def _scan(folder, results, *options):
+    return cli.main(["scan", str(folder), "--ext", ".txt", "--no-cache", "--workers", "1", "--threshold", "70",
+                     "--out", str(folder.parent / "out.csv"), "--results", str(results), *options])
+
+def _shards(folder, count):
+    paths = [folder.parent / f"shard{index}.json" for index in range(1, count + 1)]
+    for index, path in enumerate(paths, 1): _scan(folder, path, "--shard", f"{index}/{count}")
+    return paths
+
+def _pairs(rows):
+    return sorted((row[1], row[2], row[0]) for row in rows)
+
+def test_shard_of_assigns_every_pair_to_one_shard_in_either_order():
+    hashes = [content_hash(f"file {index}") for index in range(40)]
+    for count in (1, 2, 3, 7):
+        for first, second in itertools.combinations(hashes, 2):
+            assert 0 <= shard_of(first, second, count) < count
+            assert shard_of(first, second, count) == shard_of(second, first, count)
+
+def test_shards_partition_the_scored_pairs():
+    files, _ = generate_corpus(24, "text", seed=9)
+    whole = ScanEngine("text", workers=1, threshold=0.7).run(files)
+    expected = _pairs(whole.ranked(include_below=True))
+    for count in (2, 3):
+        rows = []
+        for index in range(count):
+            rows += ScanEngine("text", workers=1, threshold=0.7, shard=(index, count)).run(files).ranked(include_below=True)
+        assert _pairs(rows) == expected # Every pair exactly once: no repeats, none lost
+
+def test_merge_matches_an_unsharded_scan(tmp_path, monkeypatch):
+    folder = _folder(tmp_path, monkeypatch)
+    _scan(folder, tmp_path / "whole.json")
+    whole_meta, whole_rows = read_result_file(tmp_path / "whole.json")
+    meta, rows = merge_result_files(_shards(folder, 3))
+    assert _pairs(rows) == _pairs(whole_rows)
+    assert sorted(row[3] != 0 for row in rows) == sorted(row[3] != 0 for row in whole_rows)
+    assert meta["complete_from"] == whole_meta["complete_from"] > 0
+    assert meta["stats"]["pairs_total"] == whole_meta["stats"]["pairs_total"]
+
+def test_merge_rejects_missing_repeated_and_foreign_shards(tmp_path, monkeypatch):
+    folder = _folder(tmp_path, monkeypatch)
+    first, second, third = _shards(folder, 3)
+    with pytest.raises(ValueError, match="Missing shard"): merge_result_files([first, third])
+    with pytest.raises(ValueError, match="given twice"): merge_result_files([first, second, second, third])
+
+    data = json.loads(third.read_text())
+    data["file_set"] = "0" * 64
+    foreign = tmp_path / "foreign.json"
+    foreign.write_text(json.dumps(data))
+    with pytest.raises(ValueError, match="different scan"): merge_result_files([first, second, foreign])
+
+    _scan(folder, tmp_path / "whole.json")
+    with pytest.raises(ValueError, match="not a shard"): merge_result_files([first, second, tmp_path / "whole.json"])
@@ -0,0 +1,40 @@
+from copy_jikiller.logic import build_template_index, build_artifact, split_joined_tokens
+
+TEMPLATE = """def read_input(path):
+    with open(path) as handle:
+        lines = handle.read().splitlines()
+    numbers = [int(line) for line in lines if line]
+    return numbers
+"""
+
+STUDENT = """def helper(values, bound):
+    kept = []
+    for value in values:
+        if value < bound:
+            kept.append(value * 3)
+    return kept
+"""
+
+def _tokens(content, mode="python"):
+    return split_joined_tokens(build_artifact(content, mode)[0])
+
+def _strip(template, content, mode="python"):
+    return build_template_index([template], mode).strip(_tokens(content, mode))
+
+def test_template_before_student_code_is_stripped():
+    stripped, removed = _strip(TEMPLATE, TEMPLATE + "\n" + STUDENT)
+    assert removed == len(_tokens(TEMPLATE))
+    assert stripped == _tokens(STUDENT)
+
+def test_template_after_student_code_is_stripped():
+    # Identifier tokens must not depend on what precedes them, or the template only matches at the top
+    stripped, removed = _strip(TEMPLATE, STUDENT + "\n" + TEMPLATE)
+    assert removed == len(_tokens(TEMPLATE))
+    assert stripped == _tokens(STUDENT)
+
+def test_renamed_template_is_stripped():
+    renamed = TEMPLATE.replace("numbers", "values").replace("handle", "f")
+    assert _strip(TEMPLATE, STUDENT + "\n" + renamed)[1] == len(_tokens(TEMPLATE))
+
+def test_unrelated_code_is_kept():
+    assert _strip(TEMPLATE, STUDENT) == (_tokens(STUDENT), 0)